@@ -0,0 +1,49 @@
+import time
+
+from compact import compact_fixtures, memory_report
+from schemas import FIXTURE_SCHEMA, flatten
+from synthetic_data import multi_season_fixtures
+
+# Parsing benchmark: schema engine vs the old per-row dict approach on a big multi-season payload
+# Run with: python bench_parsing.py
+
+
+def rowwise_flatten(items, schema):
+    """What the get_* methods used to do, one dict per row with a chain of .get() calls."""
+    import pandas as pd
+
+    def dig(item, parts):
+        for part in parts:
+            item = (item or {}).get(part)
+        return item
+
+    paths = [(tuple(path.split(".")), column) for path, column, _ in schema]
+    return pd.DataFrame([{column: dig(item, parts) for parts, column in paths} for item in items])
+
+
+def best_of(fn, repeats: int = 3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n_fixtures: int = 50000):
+    items = multi_season_fixtures(n_fixtures)
+    print(f"Payload: {len(items)} fixtures")
+
+    for name, fn in (("schema engine", flatten), ("row-wise dicts", rowwise_flatten)):
+        seconds = best_of(lambda: fn(items, FIXTURE_SCHEMA))
+        print(f"{name:>15}: {seconds:.3f}s  ({len(items) / seconds:,.0f} rows/sec)")
+
+    df = flatten(items, FIXTURE_SCHEMA)
+    seconds = best_of(lambda: compact_fixtures(df))
+    report = memory_report(df, *compact_fixtures(df))
+    print(f"{'compact mode':>15}: {seconds:.3f}s  {report['before_bytes'] / 1e6:.1f} MB -> "
+          f"{report['after_bytes'] / 1e6:.1f} MB ({report['ratio']:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+
+from datatry import ComprehensiveSoccerDataIngestion
+from rate_limit import RateLimiter
+from schemas import (FIXTURE_SCHEMA, LEAGUE_SCHEMA, PLAYER_SCHEMA, STANDINGS_SCHEMA, TEAM_STATS_SCHEMA, flatten,
+                     flatten_one, player_rows, standings_rows)
+
+# Offline benchmark for the ingestion client against the local stand-in API (stand_in_server.py),
+# which runs in its own process so it doesnt skew the client's timings or memory numbers.
+# Run with: python benchmark.py --profile clean --iterations 20
+
+PROFILES = {
+    "clean": {"latency": 0.005},
+    "throttled": {"latency": 0.01, "requests_per_minute": 600, "rate_429": 0.05},
+    "flaky": {"latency": 0.03, "jitter": 0.05, "timeout_rate": 0.02, "timeout_delay": 1.0},
+}
+
+
+def _run_fixtures(client, i):
+    return len(client.get_fixtures(league=1 + i % 5, season=2010 + i // 5 % 10))
+
+
+def _run_standings(client, i):
+    return len(client.get_standings(league=1 + i % 5, season=2010 + i // 5 % 10))
+
+
+def _run_team_stats(client, i):
+    return 1 if client.get_teams_statistics(league=1, season=2020, team=1001 + i % 20) else 0
+
+
+def _run_team_stats_batch(client, i):
+    calls = [("teams/statistics", {"league": 1 + i % 5, "season": 2020, "team": (1 + i % 5) * 1000 + t})
+             for t in range(1, 21)]
+    return sum(1 for result in client.fetch_many(calls) if result.ok)
+
+
+def _run_player(client, i):
+    return len(client.get_player_stats(player_id=100101 + i, season=2020).get("response", []))
+
+
+def _run_players_pages(client, i):
+    return sum(len(page) for page in client.iter_players(league=1 + i % 5, season=2020, resume=False))
+
+
+def _run_leagues(client, i):
+    return len(client.get_leagues())
+
+
+def _run_fixtures_by_ids(client, i):
+    first = (1 * 10000 + 10 + i % 10) * 1000 + 1  # league 1, seasons 2010-2019
+    return len(client.get_fixtures_by_ids(range(first, first + 200)))
+
+
+def _run_h2h(client, i):
+    return len(client.get_h2h(1001 + i % 10, 1011 + i % 10, league=1, season=2015))
+
+
+# name -> (runner, (endpoint, params) for the parse timing, parse function)
+SCENARIOS = {
+    "get_fixtures": (_run_fixtures, ("fixtures", {"league": 1, "season": 2015}),
+                     lambda data: len(flatten(data["response"], FIXTURE_SCHEMA))),
+    "get_standings": (_run_standings, ("standings", {"league": 1, "season": 2015}),
+                      lambda data: len(flatten(standings_rows(data["response"]), STANDINGS_SCHEMA))),
+    "get_teams_statistics": (_run_team_stats, ("teams/statistics", {"league": 1, "season": 2020, "team": 1001}),
+                             lambda data: len([flatten_one(data["response"], TEAM_STATS_SCHEMA)])),
+    "fetch_many teams/statistics x20": (_run_team_stats_batch, None, None),
+    "get_player_stats": (_run_player, None, None),
+    "iter_players (all pages)": (_run_players_pages, ("players", {"league": 1, "season": 2020, "page": 1}),
+                                 lambda data: len(flatten(player_rows(data["response"]), PLAYER_SCHEMA))),
+    "get_leagues": (_run_leagues, ("leagues", {}), lambda data: len(flatten(data["response"], LEAGUE_SCHEMA))),
+    "get_fixtures_by_ids x200": (_run_fixtures_by_ids, None, None),
+    "get_h2h": (_run_h2h, None, None),
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class StandInProcess:
+    """Starts stand_in_server.py in a subprocess with the given profile and waits until it answers."""
+
+    FLAGS = {"requests_per_minute": "--rpm"}
+
+    def __init__(self, profile):
+        self.profile = profile
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process = None
+
+    def __enter__(self):
+        args = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "stand_in_server.py"),
+                "--port", str(self.port)]
+        for key, value in PROFILES[self.profile].items():
+            args += [self.FLAGS.get(key, "--" + key.replace("_", "-")), str(value)]
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL)
+        for _ in range(100):
+            try:
+                requests.get(f"{self.url}/_stats", timeout=0.5)
+                return self
+            except requests.exceptions.RequestException:
+                time.sleep(0.05)
+        self.process.kill()
+        raise RuntimeError("Stand-in server did not start")
+
+    def stats(self):
+        return requests.get(f"{self.url}/_stats", timeout=5).json()
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=5)
+
+
+def make_client(server, profile):
+    rpm = PROFILES[profile].get("requests_per_minute") or 6000
+    client = ComprehensiveSoccerDataIngestion(
+        api_key=f"bench-{profile}",
+        cache_mode="bypass",
+        rate_limiter=RateLimiter(requests_per_minute=rpm, base_backoff=0.05, max_backoff=1.0),
+        max_workers=8,
+        request_timeout=0.5,
+    )
+    client.base_url = server.url
+    return client
+
+
+def run_scenario(client, name, iterations):
+    runner, parse_call, parse = SCENARIOS[name]
+    runner(client, 0)  # warm-up: server side generation, connection pool, fixture store
+
+    latencies = []
+    hook = lambda response, *args, **kwargs: latencies.append(response.elapsed.total_seconds())
+    client.session.hooks["response"] = [hook]
+    started = time.perf_counter()
+    rows = 0
+    for i in range(iterations):
+        rows += runner(client, i)
+    wall = time.perf_counter() - started
+    client.session.hooks["response"] = []
+
+    # Separate pass for memory since tracemalloc slows everything down a lot
+    tracemalloc.start()
+    runner(client, 0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "scenario": name,
+        "iterations": iterations,
+        "requests": len(latencies),
+        "wall_s": wall,
+        "requests_per_s": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "rows": rows,
+        "parse_rows_per_s": None,
+        "peak_mem_mb": peak / (1024 * 1024),
+    }
+
+    if parse_call is not None:
+        data = client.api_call(*parse_call)
+        repeats = 20
+        started = time.perf_counter()
+        parsed = sum(parse(data) for _ in range(repeats))
+        elapsed = time.perf_counter() - started
+        result["parse_rows_per_s"] = parsed / elapsed if elapsed else None
+    return result
+
+
+def run(profile: str = "clean", iterations: int = 10, scenarios=None):
+    results = []
+    workdir = os.getcwd()
+    # The client writes its cache/store folders relative to cwd, keep them out of the repo
+    with tempfile.TemporaryDirectory() as tmp, StandInProcess(profile) as server:
+        os.chdir(tmp)
+        try:
+            client = make_client(server, profile)
+            for name in scenarios or SCENARIOS:
+                results.append(run_scenario(client, name, iterations))
+        finally:
+            os.chdir(workdir)
+        server_stats = server.stats()
+    return results, server_stats
+
+
+def print_report(profile, results, server_stats):
+    print(f"\nProfile: {profile}  (server served {server_stats['served']}, "
+          f"429s {server_stats['throttled']}, slow/timeouts {server_stats['timed_out']})")
+    header = f"{'scenario':<34}{'reqs':>6}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'rows':>8}{'parse rows/s':>14}{'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        parse = f"{r['parse_rows_per_s']:,.0f}" if r["parse_rows_per_s"] else "-"
+        print(f"{r['scenario']:<34}{r['requests']:>6}{r['requests_per_s']:>9.1f}{r['p50_ms']:>9.1f}"
+              f"{r['p99_ms']:>9.1f}{r['rows']:>8}{parse:>14}{r['peak_mem_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline ingestion benchmark against a local stand-in API")
+    parser.add_argument("--profile", choices=sorted(PROFILES), action="append",
+                        help="server behaviour, can be repeated (default: clean)")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for profile in args.profile or ["clean"]:
+        results, server_stats = run(profile, args.iterations, args.scenario)
+        print_report(profile, results, server_stats)
+        report[profile] = {"results": results, "server": server_stats}
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# Fixture statuses that will never change again, so those responses can be kept forever
+FINISHED_STATUSES = {"FT", "AET", "PEN", "AWD", "WO", "CANC"}
+# Finished and actually played, the matches that count in tables/stats (no awarded or cancelled ones)
+PLAYED_STATUSES = ("FT", "AET", "PEN")
+LIVE_STATUSES = {"1H", "HT", "2H", "ET", "BT", "P", "SUSP", "INT", "LIVE"}
+
+# TTLs in seconds, None means never expires
+LIVE_TTL = 15
+UPCOMING_TTL = 60
+STANDINGS_TTL = 6 * 60 * 60
+TEAM_STATS_TTL = 6 * 60 * 60
+DEFAULT_TTL = 24 * 60 * 60
+
+CACHE_MODES = ("normal", "cache-only", "refresh", "bypass")
+
+
+def atomic_write_json(path, obj):
+    """Writes to a temp file in the same folder and renames it over path, so a crash never leaves half a file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def normalize_params(params):
+    """Drops empty params and turns the rest into sorted strings so equal requests get equal keys."""
+    return {str(k): str(v) for k, v in sorted((params or {}).items()) if v is not None and v != ""}
+
+
+def cache_key(endpoint, params):
+    """Content address for (endpoint, params)."""
+    raw = json.dumps([endpoint.strip("/"), normalize_params(params)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def ttl_for(endpoint, params, payload):
+    """
+    Picks how long a response stays fresh based on what is in it.
+    Finished fixtures never change, live ones change every few seconds.
+    """
+    endpoint = endpoint.strip("/")
+    if endpoint in ("fixtures", "fixtures/headtohead"):
+        statuses = {
+            (item.get("fixture") or {}).get("status", {}).get("short")
+            for item in payload.get("response", []) or []
+        }
+        if not statuses:
+            return UPCOMING_TTL
+        if statuses <= FINISHED_STATUSES:
+            return None
+        if statuses & LIVE_STATUSES:
+            return LIVE_TTL
+        return UPCOMING_TTL
+    if endpoint == "standings":
+        return STANDINGS_TTL
+    if endpoint == "teams/statistics":
+        return TEAM_STATS_TTL
+    return DEFAULT_TTL
+
+
+class ResponseCache:
+    """
+    On-disk cache of raw API responses, one JSON file per (endpoint, params).
+    Reads touch the file so eviction can drop the least recently used entries
+    once the folder grows over max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None  # lazily computed on first write
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, endpoint, params):
+        """Returns the cached payload or None if it is missing or stale."""
+        path = self._path(cache_key(endpoint, params))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and expires_at < time.time():
+            self.misses += 1
+            return None
+
+        # Bump the mtime so this counts as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry.get("payload")
+
+    def has(self, endpoint, params):
+        """True if a fresh payload is stored. Doesnt count as a hit/miss or bump the LRU order."""
+        try:
+            with open(self._path(cache_key(endpoint, params)), "r", encoding="utf-8") as f:
+                expires_at = json.load(f).get("expires_at")
+        except (OSError, ValueError):
+            return False
+        return expires_at is None or expires_at >= time.time()
+
+    def put(self, endpoint, params, payload, ttl=...):
+        """Stores a payload. ttl defaults to whatever ttl_for picks, None keeps it forever."""
+        # API-Football answers with 200 + an "errors" block when something is wrong, never cache those
+        if not payload or payload.get("errors"):
+            return
+        if ttl is ...:
+            ttl = ttl_for(endpoint, params, payload)
+
+        now = time.time()
+        entry = {
+            "endpoint": endpoint,
+            "params": normalize_params(params),
+            "stored_at": now,
+            "expires_at": None if ttl is None else now + ttl,
+            "payload": payload,
+        }
+        path = self._path(cache_key(endpoint, params))
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        atomic_write_json(path, entry)
+
+        if self._total_bytes is None:
+            self._total_bytes = self._scan_size()
+        else:
+            self._total_bytes += os.path.getsize(path) - old_size
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def invalidate(self, endpoint, params):
+        path = self._path(cache_key(endpoint, params))
+        if os.path.exists(path):
+            os.remove(path)
+            self._total_bytes = None
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target_bytes: int = None):
+        """Removes least recently used entries until the cache is under target_bytes (90% of max by default)."""
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+    def clear(self):
+        for path, _, _ in list(self._entries()):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._total_bytes = 0
@@ -0,0 +1,144 @@
+import pandas as pd
+
+# Compact versions of the fixtures/standings frames: small ints, categoricals, real datetimes
+# and the repeated team/venue/league strings moved into dimension tables keyed by id.
+
+FIXTURE_INT_TYPES = {
+    "fixture_id": "Int32",
+    "venue_id": "Int32",
+    "status_elapsed": "Int16",
+    "league_id": "Int32",
+    "league_season": "Int16",
+    "home_team_id": "Int32",
+    "away_team_id": "Int32",
+    "home_goals": "Int8",
+    "away_goals": "Int8",
+    "halftime_home": "Int8",
+    "halftime_away": "Int8",
+    "fulltime_home": "Int8",
+    "fulltime_away": "Int8",
+    "extratime_home": "Int8",
+    "extratime_away": "Int8",
+    "penalty_home": "Int8",
+    "penalty_away": "Int8",
+}
+FIXTURE_CATEGORIES = ["referee", "timezone", "status_long", "status_short", "league_round"]
+
+STANDINGS_INT_TYPES = {
+    "rank": "Int16",
+    "team_id": "Int32",
+    "points": "Int16",
+    "goalsDiff": "Int16",
+    "played": "Int16",
+    "win": "Int16",
+    "draw": "Int16",
+    "lose": "Int16",
+    "goals_for": "Int16",
+    "goals_against": "Int16",
+    "home_played": "Int16",
+    "home_win": "Int16",
+    "home_draw": "Int16",
+    "home_lose": "Int16",
+    "away_played": "Int16",
+    "away_win": "Int16",
+    "away_draw": "Int16",
+    "away_lose": "Int16",
+}
+STANDINGS_CATEGORIES = ["group", "form", "status", "description"]
+
+# Dimension table -> the id column it is keyed on
+DIMENSION_KEYS = {"teams": "team_id", "venues": "venue_id", "leagues": "league_id"}
+
+
+def _categorize(df, columns):
+    for column in columns:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+
+
+def _downcast(df, types):
+    for column, dtype in types.items():
+        if column in df.columns:
+            df[column] = df[column].astype(dtype)
+
+
+def _dimension(df, id_column, columns, rename):
+    """Unique rows of columns keyed by id_column, renamed to the dimension's column names."""
+    present = [c for c in [id_column] + columns if c in df.columns]
+    dim = df[present].dropna(subset=[id_column]).drop_duplicates(subset=[id_column], keep="last")
+    return dim.rename(columns=rename).reset_index(drop=True)
+
+
+def compact_fixtures(df):
+    """
+    Returns (facts, dims). facts keeps ids, scores and statuses in small types with a tz-aware
+    kickoff datetime, dims is {"teams", "venues", "leagues"} holding the names/logos/cities once per id.
+    """
+    teams = pd.concat([
+        _dimension(df, "home_team_id", ["home_team_name", "home_team_logo"],
+                   {"home_team_id": "team_id", "home_team_name": "team_name", "home_team_logo": "team_logo"}),
+        _dimension(df, "away_team_id", ["away_team_name", "away_team_logo"],
+                   {"away_team_id": "team_id", "away_team_name": "team_name", "away_team_logo": "team_logo"}),
+    ], ignore_index=True).drop_duplicates(subset=["team_id"], keep="last").reset_index(drop=True)
+    dims = {
+        "teams": teams,
+        "venues": _dimension(df, "venue_id", ["venue_name", "venue_city"], {}),
+        "leagues": _dimension(df, "league_id", ["league_name", "league_country"], {}),
+    }
+    for dim in dims.values():
+        _downcast(dim, {c: "Int32" for c in DIMENSION_KEYS.values()})
+
+    dropped = ["home_team_name", "home_team_logo", "away_team_name", "away_team_logo", "venue_name", "venue_city",
+               "league_name", "league_country", "timestamp"]
+    facts = df.drop(columns=[c for c in dropped if c in df.columns])
+    if "date" in facts.columns:
+        facts["date"] = pd.to_datetime(facts["date"], utc=True)
+    _downcast(facts, FIXTURE_INT_TYPES)
+    _categorize(facts, FIXTURE_CATEGORIES)
+    return facts, dims
+
+
+def compact_standings(df):
+    """Returns (facts, dims) for a standings frame, team names/logos go to dims["teams"]."""
+    dims = {"teams": _dimension(df, "team_id", ["team_name", "team_logo"], {})}
+    _downcast(dims["teams"], {"team_id": "Int32"})
+    facts = df.drop(columns=[c for c in ("team_name", "team_logo") if c in df.columns])
+    _downcast(facts, STANDINGS_INT_TYPES)
+    _categorize(facts, STANDINGS_CATEGORIES)
+    return facts, dims
+
+
+def expand_fixtures(facts, dims):
+    """Joins the team/venue/league names back on, for when a readable wide frame is needed."""
+    teams = dims["teams"]
+    out = facts.merge(teams.add_prefix("home_"), on="home_team_id", how="left")
+    out = out.merge(teams.add_prefix("away_"), on="away_team_id", how="left")
+    out = out.merge(dims["venues"], on="venue_id", how="left")
+    return out.merge(dims["leagues"], on="league_id", how="left")
+
+
+def memory_report(original, facts, dims):
+    """Deep memory usage before and after, in bytes, plus how many times smaller it got."""
+    before = int(original.memory_usage(deep=True).sum())
+    after = int(facts.memory_usage(deep=True).sum()) + sum(int(d.memory_usage(deep=True).sum()) for d in dims.values())
+    return {"before_bytes": before, "after_bytes": after, "ratio": before / after if after else 0.0}
+
+
+class DimensionTables:
+    """Team/venue/league lookup tables collected across calls, newest values win."""
+
+    def __init__(self):
+        self.tables = {}
+
+    def update(self, dims):
+        for name, dim in dims.items():
+            key = DIMENSION_KEYS[name]
+            current = self.tables.get(name)
+            merged = dim if current is None else pd.concat([current, dim], ignore_index=True)
+            self.tables[name] = merged.drop_duplicates(subset=[key], keep="last").reset_index(drop=True)
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+    def get(self, name, default=None):
+        return self.tables.get(name, default)
@@ -0,0 +1,371 @@
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from planner import ENDPOINTS, IngestionPlan, expand_manifest, load_manifest
+from rate_limit import backoff_delay, header_int, quota_day
+
+logger = logging.getLogger(__name__)
+
+# Shared state for several worker processes (and several API keys) in one SQLite file.
+# SQLite's own file locking does the coordination: every read-modify-write runs inside
+# BEGIN IMMEDIATE, so only one process at a time can lease a unit or take a request slot.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+    key_id TEXT PRIMARY KEY,
+    daily_limit INTEGER NOT NULL,
+    daily_used INTEGER NOT NULL DEFAULT 0,
+    daily_remaining INTEGER,          -- what the server last said, NULL until a response came back
+    day TEXT,
+    minute_limit INTEGER NOT NULL,
+    minute_start REAL NOT NULL DEFAULT 0,
+    minute_used INTEGER NOT NULL DEFAULT 0,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS units (
+    unit_id TEXT PRIMARY KEY,         -- league-season-table
+    league INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    tbl TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    depends_on TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',   -- pending / leased / done / failed
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    requests INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL
+);
+"""
+
+MAX_ATTEMPTS = 3
+
+
+def key_id(api_key):
+    """Short fingerprint so the database never holds the raw key."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+class QuotaCoordinator:
+    """
+    Work queue + quota book-keeping shared by every worker that opens the same database file.
+    Units are league-season-table jobs leased to one worker at a time (a crashed worker's lease
+    runs out and someone else picks it up). Keys have a daily and a per-minute budget that
+    reserve_request() hands out one request at a time, always from the key with the most left.
+    """
+
+    def __init__(self, path: str = os.path.join("soccer_data_cache", "coordinator.sqlite"),
+                 lease_seconds: float = 300.0, reserve: int = 2):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.reserve = reserve  # requests left unused per key per day, same margin as the client's quota check
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return _Transaction(db)
+
+    # Keys
+
+    def register_key(self, api_key, daily_limit: int = 100, requests_per_minute: int = 10):
+        """Adds a key (limits of an already known key are updated). Returns its key_id."""
+        kid = key_id(api_key)
+        with self._connect() as db:
+            db.execute("INSERT INTO keys (key_id, daily_limit, minute_limit, day) VALUES (?, ?, ?, ?) "
+                       "ON CONFLICT(key_id) DO UPDATE SET daily_limit = excluded.daily_limit, "
+                       "minute_limit = excluded.minute_limit",
+                       (kid, daily_limit, requests_per_minute, quota_day()))
+        return kid
+
+    def _roll(self, row, now):
+        """Resets the day/minute counters of a key row if their window has passed."""
+        row = dict(row)
+        if row["day"] != quota_day():
+            row.update(day=quota_day(), daily_used=0, daily_remaining=None)
+        if now - row["minute_start"] >= 60.0:
+            row.update(minute_start=now, minute_used=0)
+        return row
+
+    def _daily_left(self, row):
+        left = row["daily_limit"] - row["daily_used"]
+        if row["daily_remaining"] is not None:
+            left = min(left, row["daily_remaining"])
+        return left - self.reserve
+
+    def reserve_request(self, key_ids):
+        """
+        Takes one request slot from the key (of key_ids) with the most daily budget that also has
+        room this minute. Returns (key_id, 0.0), or (None, seconds) to wait when every key is busy
+        this minute, or (None, None) when every key is out for the day.
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.begin()
+            placeholders = ",".join("?" * len(key_ids))
+            rows = [self._roll(r, now) for r in db.execute(f"SELECT * FROM keys WHERE key_id IN ({placeholders})",
+                                                               list(key_ids))]
+            usable = [r for r in rows if self._daily_left(r) > 0]
+            if not usable:
+                return None, None
+            ready = [r for r in usable if r["blocked_until"] <= now and r["minute_used"] < r["minute_limit"]]
+            if not ready:
+                waits = [max(r["blocked_until"] - now,
+                             r["minute_start"] + 60.0 - now if r["minute_used"] >= r["minute_limit"] else 0.0)
+                         for r in usable]
+                return None, max(0.01, min(waits))
+
+            row = max(ready, key=lambda r: (self._daily_left(r), r["minute_limit"] - r["minute_used"]))
+            db.execute("UPDATE keys SET day = ?, daily_used = ?, daily_remaining = ?, minute_start = ?, minute_used = ? "
+                       "WHERE key_id = ?",
+                       (row["day"], row["daily_used"] + 1,
+                        None if row["daily_remaining"] is None else row["daily_remaining"] - 1,
+                        row["minute_start"], row["minute_used"] + 1, row["key_id"]))
+            return row["key_id"], 0.0
+
+    def record_headers(self, kid, headers):
+        """Syncs a key with the rate limit headers of a response it got."""
+        daily_remaining = header_int(headers.get("x-ratelimit-requests-remaining"))
+        daily_limit = header_int(headers.get("x-ratelimit-requests-limit"))
+        minute_limit = header_int(headers.get("x-ratelimit-limit"))
+        minute_remaining = header_int(headers.get("x-ratelimit-remaining"))
+        now = time.time()
+        with self._connect() as db:
+            db.begin()
+            row = db.execute("SELECT * FROM keys WHERE key_id = ?", (kid,)).fetchone()
+            if row is None:
+                return
+            row = self._roll(row, now)
+            if daily_remaining is not None:
+                # Requests other workers reserved may not have reached the server yet, keep the lower number
+                current = row["daily_remaining"]
+                row["daily_remaining"] = daily_remaining if current is None else min(current, daily_remaining)
+            if daily_limit:
+                row["daily_limit"] = daily_limit
+            if minute_limit:
+                row["minute_limit"] = minute_limit
+            if minute_remaining is not None:
+                row["minute_used"] = max(row["minute_used"], row["minute_limit"] - minute_remaining)
+            db.execute("UPDATE keys SET day = ?, daily_used = ?, daily_remaining = ?, daily_limit = ?, "
+                       "minute_limit = ?, minute_start = ?, minute_used = ? WHERE key_id = ?",
+                       (row["day"], row["daily_used"], row["daily_remaining"], row["daily_limit"],
+                        row["minute_limit"], row["minute_start"], row["minute_used"], kid))
+
+    def block_key(self, kid, seconds):
+        """Stops handing out a key for a while (after a 429), the other keys keep going."""
+        with self._connect() as db:
+            db.execute("UPDATE keys SET blocked_until = MAX(blocked_until, ?) WHERE key_id = ?",
+                       (time.time() + seconds, kid))
+
+    def key_status(self, key_ids=None):
+        """{key_id: requests left today} (after the reserve)."""
+        now = time.time()
+        with self._connect() as db:
+            rows = [self._roll(r, now) for r in db.execute("SELECT * FROM keys")]
+        return {r["key_id"]: max(0, self._daily_left(r)) for r in rows if key_ids is None or r["key_id"] in key_ids}
+
+    # Work units
+
+    def add_manifest(self, manifest):
+        """
+        Queues a unit per league-season-table of a planner manifest. Units already queued are left
+        alone, so running this from every worker is fine. Team stats wait for the fixtures unit
+        of their league-season. Returns how many units were new.
+        """
+        added = 0
+        now = time.time()
+        with self._connect() as db:
+            db.begin()
+            for league, season, table, priority in expand_manifest(load_manifest(manifest)):
+                depends_on = f"{league}-{season}-fixtures" if table == "team_stats" else None
+                cursor = db.execute(
+                    "INSERT OR IGNORE INTO units (unit_id, league, season, tbl, priority, depends_on, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (f"{league}-{season}-{table}", league, season, table, priority, depends_on, now))
+                added += cursor.rowcount
+        return added
+
+    def lease(self, worker, n: int = 1):
+        """Hands up to n runnable units to worker (pending ones, or leases that ran out)."""
+        now = time.time()
+        with self._connect() as db:
+            db.begin()
+            rows = db.execute(
+                "SELECT * FROM units WHERE (status = 'pending' OR (status = 'leased' AND lease_until < ?)) "
+                "AND (depends_on IS NULL OR depends_on IN (SELECT unit_id FROM units WHERE status = 'done')) "
+                "ORDER BY priority, rowid LIMIT ?", (now, n)).fetchall()
+            for row in rows:
+                db.execute("UPDATE units SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                           "updated_at = ? WHERE unit_id = ?", (worker, now + self.lease_seconds, now, row["unit_id"]))
+            return [dict(row) for row in rows]
+
+    def renew(self, unit_id, worker):
+        """Pushes worker's lease on a unit out by lease_seconds. False if the lease was lost to someone else."""
+        with self._connect() as db:
+            cursor = db.execute("UPDATE units SET lease_until = ? WHERE unit_id = ? AND worker = ? AND status = 'leased'",
+                                (time.time() + self.lease_seconds, unit_id, worker))
+            return cursor.rowcount == 1
+
+    def complete(self, unit_id, worker, requests: int = 0):
+        """Marks a unit done. False if worker doesnt hold the lease anymore."""
+        with self._connect() as db:
+            cursor = db.execute("UPDATE units SET status = 'done', requests = requests + ?, error = NULL, updated_at = ? "
+                                "WHERE unit_id = ? AND worker = ? AND status = 'leased'",
+                                (requests, time.time(), unit_id, worker))
+            return cursor.rowcount == 1
+
+    def release(self, unit_id, worker, requests: int = 0, error: str = None, count_attempt: bool = True):
+        """
+        Gives a unit back. It goes back to pending, or to failed after MAX_ATTEMPTS.
+        count_attempt=False is for units that stopped because the quota ran out.
+        """
+        with self._connect() as db:
+            db.begin()
+            row = db.execute("SELECT attempts FROM units WHERE unit_id = ? AND worker = ? AND status = 'leased'",
+                             (unit_id, worker)).fetchone()
+            if row is None:
+                return False
+            attempts = row["attempts"] if count_attempt else row["attempts"] - 1
+            status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+            db.execute("UPDATE units SET status = ?, attempts = ?, requests = requests + ?, error = ?, worker = NULL, "
+                       "lease_until = NULL, updated_at = ? WHERE unit_id = ?",
+                       (status, attempts, requests, error, time.time(), unit_id))
+            return True
+
+    def progress(self):
+        """Unit counts by status plus the requests spent so far."""
+        with self._connect() as db:
+            counts = {r["status"]: r["n"] for r in db.execute("SELECT status, COUNT(*) AS n FROM units GROUP BY status")}
+            requests = db.execute("SELECT COALESCE(SUM(requests), 0) FROM units").fetchone()[0]
+        return {**counts, "requests": requests}
+
+
+class _Transaction:
+    """Context manager around a connection: commits what begin() started, rolls back on errors, closes."""
+
+    def __init__(self, db):
+        self.db = db
+        self.active = False
+
+    def begin(self):
+        self.db.execute("BEGIN IMMEDIATE")  # takes the write lock now, so the reads after it are consistent
+        self.active = True
+
+    def execute(self, *args):
+        return self.db.execute(*args)
+
+    def executescript(self, script):
+        return self.db.executescript(script)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        try:
+            if self.active:
+                self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.db.close()
+
+
+class KeyRouter:
+    """
+    Drop-in for RateLimiter (rate_limiter=KeyRouter(...)) that spreads a client's requests over
+    several API keys through a QuotaCoordinator. Every request goes out on whichever key has budget,
+    429s only pause the key that got them, and the quota SystemExit only fires once all keys are done.
+    """
+
+    def __init__(self, coordinator, api_keys, daily_limit: int = 100, requests_per_minute: int = 10,
+                 base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.coordinator = coordinator
+        self.api_keys = {coordinator.register_key(k, daily_limit, requests_per_minute): k for k in api_keys}
+        self.capacity = float(requests_per_minute * len(self.api_keys))  # fetch_many sizes its pool on this
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.minute_remaining = None
+        self.total_wait = 0.0
+        self._local = threading.local()  # the key picked for the request this thread is making
+
+    @property
+    def daily_remaining(self):
+        return sum(self.coordinator.key_status(self.api_keys).values())
+
+    @property
+    def current_key(self):
+        return getattr(self._local, "key_id", None)
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            kid, wait = self.coordinator.reserve_request(list(self.api_keys))
+            if kid is not None:
+                self._local.key_id = kid
+                self.total_wait += waited
+                return waited
+            if wait is None:
+                logger.error("Daily quota used up on every key.")
+                raise SystemExit("Daily quota used up on every key")
+            wait = min(wait, 1.0)  # check again soon, another worker may free up a key's 429 block
+            time.sleep(wait)
+            waited += wait
+
+    def request_headers(self):
+        return {"x-apisports-key": self.api_keys[self.current_key]}
+
+    def update_from_headers(self, headers):
+        if self.current_key is not None:
+            self.coordinator.record_headers(self.current_key, headers)
+        self.minute_remaining = header_int(headers.get("x-ratelimit-remaining"))
+
+    def quota_exhausted(self):
+        return self.daily_remaining < 1
+
+    def backoff(self, attempt, retry_after=None):
+        delay = backoff_delay(attempt, retry_after, self.base_backoff, self.max_backoff)
+        if self.current_key is not None:
+            self.coordinator.block_key(self.current_key, delay)
+        return delay
+
+
+def run_worker(client, coordinator, worker: str = None, max_units: int = None):
+    """
+    Leases units and runs each one through a planner.IngestionPlan until the queue is empty,
+    max_units ran or the quota is out. Anything already stored or cached costs nothing, and a
+    unit interrupted halfway resumes from its saved plan on whichever worker gets it next.
+    The lease is renewed before every call, a worker that lost it stops without sending more.
+    Returns {"units": done, "requests": spent}.
+    """
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+    done = spent = 0
+    while max_units is None or done < max_units:
+        units = coordinator.lease(worker)
+        if not units:
+            break
+        unit = units[0]
+        manifest = {"leagues": [unit["league"]], "seasons": [unit["season"]], "tables": [unit["tbl"]]}
+        plan = IngestionPlan(client, manifest, daily_budget=10 ** 9, reserve=0, name=f"unit_{unit['unit_id']}")
+        summary = plan.run(on_call=lambda params: coordinator.renew(unit["unit_id"], worker))
+        spent += summary["requests"]
+        if summary["stopped"] == "lease":
+            logger.warning("%s lost the lease on %s, leaving it to the worker that has it", worker, unit["unit_id"])
+        elif summary["stopped"] == "done":
+            if coordinator.complete(unit["unit_id"], worker, summary["requests"]):
+                done += 1
+                logger.info("%s finished %s (%d requests)", worker, unit["unit_id"], summary["requests"])
+            else:
+                logger.warning("%s finished %s but had lost the lease, not counting it", worker, unit["unit_id"])
+        elif summary["stopped"] in ("quota", "budget"):
+            coordinator.release(unit["unit_id"], worker, summary["requests"], "quota", count_attempt=False)
+            break
+        else:
+            coordinator.release(unit["unit_id"], worker, summary["requests"], f"{ENDPOINTS[unit['tbl']]} calls failed")
+    return {"units": done, "requests": spent}
@@ -1,11 +1,50 @@
+import asyncio
+import json
+import logging
+import math
 import time
 import requests
 import os
 import pandas as pd
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from cache import ResponseCache, CACHE_MODES, FINISHED_STATUSES, atomic_write_json, cache_key
+from rate_limit import RateLimiter, shared_limiter
+from live import diff_live
+from metrics import IngestionMetrics
+from local_stats import (compare_recorded, standings_as_of, standings_snapshots, team_stats_as_of,
+                         team_stats_snapshots)
+from compact import DimensionTables, compact_fixtures, compact_standings, memory_report
+from fixture_store import IDS_PER_CALL, FixtureStore, SyncCheckpoint, id_batches, plan_open_fixture_calls
+from schemas import (FIXTURE_SCHEMA, H2H_SCHEMA, LEAGUE_SCHEMA, PLAYER_SCHEMA, STANDINGS_SCHEMA,
+                     flatten, h2h_winner, player_rows, standings_rows, team_stats_row)
+
+logger = logging.getLogger(__name__)
+
+
+class ApiError(Exception):
+    """Raised by api_call(raise_errors=True) when a request fails for good."""
+
+
+@dataclass
+class FetchResult:
+    endpoint: str
+    params: dict
+    data: dict = None
+    error: Exception = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
 
 class ComprehensiveSoccerDataIngestion:
     
-    def __init__(self, api_key, rate_limit_delay: float = 12.0): 
+    def __init__(self, api_key, rate_limit_delay: float = 12.0, cache_mode: str = "normal", cache_max_mb: int = 512,
+                 rate_limiter: RateLimiter = None, max_workers: int = 4, lake=None, request_timeout: float = 10.0,
+                 metrics: IngestionMetrics = None, compact: bool = False): 
         self.api_key = api_key
         self.base_url = "https://v3.football.api-sports.io"
         self.headers = {
@@ -13,49 +52,160 @@ class ComprehensiveSoccerDataIngestion:
         }
         self.cache_dir = "soccer_data_cache"
         self.rate_limit_delay = rate_limit_delay  # Worried about being on free plan for API
+        self.request_timeout = request_timeout
+        # Counters/histograms per endpoint, see metrics.py for the exporters
+        self.metrics = metrics or IngestionMetrics()
         os.makedirs(self.cache_dir, exist_ok=True)
+
+        # rate_limit_delay is only the starting pace now, the limiter switches to the
+        # real per-minute budget as soon as the response headers tell us what it is.
+        # Clients with the same key share one limiter unless one is passed in.
+        # A delay of 0 means no starting cap at all (paid plans), headers still apply once they come in.
+        start_rate = 60.0 / rate_limit_delay if rate_limit_delay > 0 else float("inf")
+        self.rate_limiter = rate_limiter or shared_limiter(api_key, requests_per_minute=start_rate)
+
+        # One pooled session so every call reuses the same keep-alive TLS connection
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_workers, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # In-flight requests by (cache key, cache mode), so duplicates wait for the first one instead of refetching
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.coalesced_calls = 0
+
+        # Responses get cached on disk so re-running things doesnt burn quota
+        # normal = read + write, cache-only = never touch the API, refresh = always fetch but still write, bypass = no cache at all
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"cache_mode must be one of {CACHE_MODES}, got {cache_mode!r}")
+        self.cache_mode = cache_mode
+        self.cache = ResponseCache(os.path.join(self.cache_dir, "responses"), max_bytes=cache_max_mb * 1024 * 1024)
+
+        # Raw fixtures per league-season, indexed by team pair for get_h2h
+        self.fixture_store = FixtureStore(os.path.join(self.cache_dir, "fixtures"))
+
+        # Optional storage.DataLake, when set fixtures/standings/team stats get upserted into parquet as they come in
+        self.lake = lake
+
+        # compact=True returns fixtures/standings with small dtypes and the team/venue/league
+        # names moved out into self.dimensions (join them back with compact.expand_fixtures)
+        self.compact = compact
+        self.dimensions = DimensionTables()
+        self.last_memory_report = None
         
         # Ensuring I got API connection
         # self.test_connection()
     
     def test_connection(self):
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/timezone",
-                headers=self.headers
+                timeout=self.request_timeout
             )
             if response.status_code == 401:
                 raise ValueError("API key is invalid. Check the RapidAPI key.") #ran into this issue, fixed with website document
             elif response.status_code == 429:
-                print("Rate limit, need to be increasing delays.") # On free plan so making sure i dont get banned
+                logger.warning("Rate limit, need to be increasing delays.") # On free plan so making sure i dont get banned
             else:
                 response.raise_for_status()
-                print("API connection successful!\n")
+                logger.info("API connection successful!")
         except requests.exceptions.RequestException as e:
-            print(f"API connection failed: {e}")
+            logger.error("API connection failed: %s", e)
             raise
         
-    def api_call(self, endpoint, params, retries: int = 3):
+    def api_call(self, endpoint, params, retries: int = 3, raise_errors: bool = False, cache_mode: str = None):
+        """
+        GETs one endpoint and returns the JSON. By default failures come back as {} like always,
+        raise_errors=True raises ApiError instead so batch callers can tell what went wrong.
+        cache_mode overrides the client's cache mode for this one call.
+        Identical calls running at the same time (other threads, fetch_many) share one request and one result.
+        """
+        cache_mode = cache_mode or self.cache_mode
+        key = (cache_key(endpoint, params), cache_mode)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced_calls += 1
+        if not leader:
+            self.metrics.inc("coalesced_total", endpoint)
+
+        if leader:
+            try:
+                future.set_result(self._api_call(endpoint, params, retries, cache_mode))
+            except BaseException as e:  # SystemExit included, everyone waiting should see it too
+                future.set_exception(e)
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+
+        try:
+            result = future.result()
+        except ApiError:
+            if raise_errors:
+                raise
+            return {}
+
+        if raise_errors and result.get("errors"):
+            raise ApiError(f"API returned errors on {endpoint}: {result['errors']}")
+        return result
+
+    def _api_call(self, endpoint, params, retries, cache_mode):
+        """The actual cache lookup + HTTP request with retries, raises ApiError when it gives up."""
+        if cache_mode in ("normal", "cache-only"):
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                self.metrics.inc("cache_hits_total", endpoint)
+                return cached
+            self.metrics.inc("cache_misses_total", endpoint)
+            if cache_mode == "cache-only":
+                logger.info("Cache miss on %s %s (cache-only mode, skipping API)", endpoint, params)
+                raise ApiError(f"{endpoint} {params} not in cache (cache-only mode)")
+
+        last_error = None
         for attempt in range(retries):
+            if attempt:
+                self.metrics.inc("retries_total", endpoint)
             try:
-                response = requests.get(
-                    f"{self.base_url}/{endpoint}", 
-                    headers=self.headers, 
-                    params=params,
-                    timeout=10
-                )
+                self.metrics.observe("wait_seconds", endpoint, self.rate_limiter.acquire())
+                self.metrics.inc("requests_total", endpoint)
+                with self.metrics.timer("network_seconds", endpoint):
+                    response = self.session.get(
+                        f"{self.base_url}/{endpoint}", 
+                        params=params,
+                        headers=self.rate_limiter.request_headers(),
+                        timeout=self.request_timeout
+                    )
+                # Content-Length is the gzipped size on the wire, content is already decompressed
+                self.metrics.inc("bytes_received_total", endpoint,
+                                 int(response.headers.get("Content-Length") or len(response.content)))
                 
+                self.rate_limiter.update_from_headers(response.headers)
+                if self.rate_limiter.minute_remaining is not None:
+                    self.metrics.set_gauge("quota_minute_remaining", self.rate_limiter.minute_remaining)
+
                 if response.status_code == 429: # once again just ensuring i do not get banned
-                    wait_time = (attempt + 1) * 5
-                    print(f" Rate limit gotten so waiting {wait_time}s before retry")
-                    time.sleep(wait_time)
+                    # the wait itself happens in acquire() before the retry
+                    wait_time = self.rate_limiter.backoff(attempt, response.headers.get("Retry-After"))
+                    self.metrics.inc("rate_limited_total", endpoint)
+                    logger.warning("Rate limit gotten so waiting %.1fs before retry", wait_time)
+                    last_error = ApiError(f"429 Too Many Requests on {endpoint}")
                     continue
                 
                 response.raise_for_status() #good saftey check
 
-                
-                # By this point, the call was successful, so now delay the next call for rate limit prevention
-                time.sleep(self.rate_limit_delay)
+                # Cache before the quota check so the last request of the day isnt wasted
+                with self.metrics.timer("json_decode_seconds", endpoint):
+                    result = response.json()
+                if cache_mode != "bypass":
+                    self.cache.put(endpoint, params, result)
 
                 remaining = response.headers.get("x-ratelimit-requests-remaining")
                 limit = response.headers.get("x-ratelimit-requests-limit")
@@ -64,35 +214,89 @@ class ComprehensiveSoccerDataIngestion:
                 if remaining and limit:
                     remaining_int = int(remaining)
                     limit_int = int(limit)
-                    print(f"API Quota: {remaining_int}/{limit_int} remaining today.") # A visual representation of API Calls left too
+                    logger.info("API Quota: %d/%d remaining today.", remaining_int, limit_int) # A visual representation of API Calls left too
+                    self.metrics.set_gauge("quota_daily_remaining", remaining_int)
+                    self.metrics.set_gauge("quota_daily_limit", limit_int)
                     
-                    if remaining_int < 2:
-                        print("STOP IT: Daily quota reached. Need to take that 24 hr break unfortunately.")
+                    # With a coordinator.KeyRouter this only fires once every key is used up
+                    if self.rate_limiter.quota_exhausted():
+                        logger.error("STOP IT: Daily quota reached. Need to take that 24 hr break unfortunately.")
                         raise SystemExit("Daily Quota almost surpassed")
                 
-                result = response.json()
                 return result
                               
-            except requests.exceptions.Timeout:
-                print(f"Request timeout on {endpoint} (attempt {attempt + 1}/{retries})")
+            except requests.exceptions.Timeout as e:
+                logger.warning("Request timeout on %s (attempt %d/%d)", endpoint, attempt + 1, retries)
+                last_error = e
                 if attempt < retries - 1:
-                    time.sleep(2)
+                    with self.metrics.timer("wait_seconds", endpoint):
+                        time.sleep(2)
                     continue
                     
             except requests.exceptions.RequestException as e:
-                print(f"API Error on {endpoint}: {e}")
+                logger.warning("API Error on %s: %s", endpoint, e)
+                last_error = e
                 if attempt < retries - 1:
-                    time.sleep(2)
+                    with self.metrics.timer("wait_seconds", endpoint):
+                        time.sleep(2)
                     continue
         
-        return {}
+        self.metrics.inc("errors_total", endpoint)
+        raise ApiError(f"{endpoint} failed after {retries} attempts: {last_error}") from last_error
+
+    @staticmethod
+    def _unpack_call(call):
+        if isinstance(call, dict):
+            return call["endpoint"], call.get("params") or {}
+        endpoint, params = call
+        return endpoint, params or {}
+
+    def fetch_many(self, calls, max_workers: int = None, retries: int = 3):
+        """
+        Runs a batch of (endpoint, params) calls concurrently on the pooled session.
+        Parallelism is capped by max_workers and the shared rate limiter keeps the total under budget.
+        Returns a FetchResult per call in the same order, failed ones carry .error instead of data.
+        """
+        calls = [self._unpack_call(c) for c in calls]
+        results = [FetchResult(endpoint, params) for endpoint, params in calls]
+        if not calls:
+            return results
+
+        workers = min(max_workers or self.max_workers, len(calls))
+        capacity = self.rate_limiter.capacity
+        if not math.isinf(capacity):  # uncapped limiter (rate_limit_delay=0), nothing to clamp to
+            workers = min(workers, int(capacity) or 1)
+        workers = max(1, workers)
+
+        def run(index):
+            endpoint, params = calls[index]
+            try:
+                results[index].data = self.api_call(endpoint, params, retries=retries, raise_errors=True)
+            except ApiError as e:
+                results[index].error = e
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run, i) for i in range(len(calls))]
+            try:
+                for future in futures:
+                    future.result()  # re-raises SystemExit if the daily quota ran out
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return results
+
+    async def afetch_many(self, calls, max_workers: int = None, retries: int = 3):
+        """Async version of fetch_many, runs the batch off the event loop."""
+        return await asyncio.to_thread(self.fetch_many, calls, max_workers, retries)
     
     def get_player_stats(self, player_id, season):
         """
         Will likely update in future.
         Fetches stats for a specific player in a specific season.
         """
-        print(f"Fetching stats for Player ID: {player_id}, Season: {season}...")
+        logger.info("Fetching stats for Player ID: %s, Season: %s...", player_id, season)
         
         # This endpoint returns all stats for one player in one season ; 1 request 
         params = {
@@ -102,6 +306,76 @@ class ComprehensiveSoccerDataIngestion:
         
         return self.api_call("players", params)
     
+    def iter_players(self, league: int = None, season: int = None, team: int = None, store: bool = None,
+                     resume: bool = True, chunk_pages: int = 10):
+        """
+        Walks every page of the players endpoint for a league-season (or a team's season) and yields
+        one typed DataFrame (PLAYER_SCHEMA) per page, so memory stays at a page or so whatever the league size.
+        store writes the rows to the lake's players table every chunk_pages pages (default: when a lake is set).
+        Progress is checkpointed per page, an interrupted walk picks up at the page it stopped on
+        unless resume=False. Pages that came back already are served from the response cache anyway.
+        """
+        if season is None or (league is None and team is None):
+            raise ValueError("iter_players needs a season and a league or a team")
+        store = self.lake is not None if store is None else store
+        if store and self.lake is None:
+            raise ValueError("iter_players(store=True) needs a lake, pass lake= to the client")
+        # Checked here so bad arguments fail on the call, not on the first next()
+        return self._player_pages(league, season, team, store, resume, chunk_pages)
+
+    def _player_pages(self, league, season, team, store, resume, chunk_pages):
+        scope = ("team", team, season) if team is not None else ("league", league, season)
+        checkpoint_path = os.path.join(self.cache_dir, "players", f"{FixtureStore.scope_name(scope)}.json")
+
+        page = 1
+        if resume and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                page = json.load(f).get("next_page", 1)
+            logger.info("Resuming players of %s %s season %s at page %d", scope[0], scope[1], season, page)
+
+        def checkpoint(next_page, total):
+            if next_page <= total:
+                atomic_write_json(checkpoint_path, {"scope": list(scope), "next_page": next_page, "total_pages": total})
+            elif os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)  # walked to the end, next time starts from page 1 again
+
+        pending = []  # pages waiting to be written, only ever chunk_pages of them
+        total = None
+        try:
+            while total is None or page <= total:
+                params = {"season": season, "page": page}
+                if league is not None: params["league"] = league
+                if team is not None: params["team"] = team
+                data = self.api_call("players", params)
+                if data.get("response") is None or data.get("errors"):
+                    logger.warning("Players page %d failed, stopping here (resume picks it up again)", page)
+                    break
+                total = (data.get("paging") or {}).get("total") or page
+
+                with self.metrics.timer("dataframe_build_seconds", "players"):
+                    rows = flatten(player_rows(data["response"]), PLAYER_SCHEMA)
+                if store:
+                    pending.append((page, rows))
+                    if len(pending) >= chunk_pages or page >= total:
+                        self.lake.upsert("players", pd.concat([r for _, r in pending], ignore_index=True))
+                        pending = []
+                        checkpoint(page + 1, total)
+                yield rows
+
+                # When not storing, the caller coming back for more is what makes a page handled
+                page += 1
+                if not store:
+                    checkpoint(page, total)
+        finally:
+            # Also runs when the caller stops early, so whatever was yielded is in the lake before the checkpoint moves
+            if pending:
+                self.lake.upsert("players", pd.concat([r for _, r in pending], ignore_index=True))
+                checkpoint(pending[-1][0] + 1, total)
+
+    def iter_team_players(self, team: int, season: int, **kwargs):
+        """iter_players for one team's squad."""
+        return self.iter_players(team=team, season=season, **kwargs)
+
     # season check
     
     def get_seasons(self):
@@ -126,15 +400,8 @@ class ComprehensiveSoccerDataIngestion:
         data = self.api_call("leagues", params)
         
         # Dataframe for leagues endpoint
-        return pd.DataFrame([
-            {
-                "league_id": item.get("league", {}).get("id"),
-                "name": item.get("league", {}).get("name"),
-                "team": item.get("league", {}).get("team"),
-                "type": item.get("league", {}).get("type")
-            }
-            for item in data.get("response", [])
-        ])
+        with self.metrics.timer("dataframe_build_seconds", "leagues"):
+            return flatten(data.get("response", []), LEAGUE_SCHEMA)
     
     def get_standings(self, league: int, season: int):
         params = {
@@ -144,39 +411,12 @@ class ComprehensiveSoccerDataIngestion:
     
         data = self.api_call("standings", params)
     
-        # Standings are nested so need to do some for loops
-        standings_list = []
-        for resp in data.get("response", []):
-            for standing_group in resp.get("league", {}).get("standings", []):
-                for team in standing_group:
-                    standings_list.append({
-                    "rank": team.get("rank"),
-                    "team_id": team.get("team", {}).get("id"),
-                    "team_name": team.get("team", {}).get("name"),
-                    "team_logo": team.get("team", {}).get("logo"),
-                    "points": team.get("points"),
-                    "goalsDiff": team.get("goalsDiff"),
-                    "group": team.get("group"),
-                    "form": team.get("form"),
-                    "status": team.get("status"),
-                    "description": team.get("description"),
-                    "played": team.get("all", {}).get("played"),
-                    "win": team.get("all", {}).get("win"),
-                    "draw": team.get("all", {}).get("draw"),
-                    "lose": team.get("all", {}).get("lose"),
-                    "goals_for": team.get("all", {}).get("goals", {}).get("for"),
-                    "goals_against": team.get("all", {}).get("goals", {}).get("against"),
-                    "home_played": team.get("home", {}).get("played"),
-                    "home_win": team.get("home", {}).get("win"),
-                    "home_draw": team.get("home", {}).get("draw"),
-                    "home_lose": team.get("home", {}).get("lose"),
-                    "away_played": team.get("away", {}).get("played"),
-                    "away_win": team.get("away", {}).get("win"),
-                    "away_draw": team.get("away", {}).get("draw"),
-                    "away_lose": team.get("away", {}).get("lose")
-                })
-    
-        return pd.DataFrame(standings_list)
+        # Standings are nested so unnest the groups first
+        with self.metrics.timer("dataframe_build_seconds", "standings"):
+            standings = flatten(standings_rows(data.get("response", [])), STANDINGS_SCHEMA)
+        if self.lake is not None:
+            self.lake.upsert("standings", standings, league_id=league, season=season)
+        return self._compacted(standings, compact_standings)
 
     def get_fixtures(self, id: int = None, date: str = None, league: int = None, season: int = None, team: int = None, last: int = None, 
                 next: int = None, from_date: str = None, to: str = None, round: str = None, status: str = None, timezone: str = None):
@@ -196,45 +436,85 @@ class ComprehensiveSoccerDataIngestion:
     
         data = self.api_call("fixtures", params)
     
-        return pd.DataFrame([
-        {
-            "fixture_id": item.get("fixture", {}).get("id"),
-            "referee": item.get("fixture", {}).get("referee"),
-            "timezone": item.get("fixture", {}).get("timezone"),
-            "date": item.get("fixture", {}).get("date"),
-            "timestamp": item.get("fixture", {}).get("timestamp"),
-            "venue_id": item.get("fixture", {}).get("venue", {}).get("id"),
-            "venue_name": item.get("fixture", {}).get("venue", {}).get("name"),
-            "venue_city": item.get("fixture", {}).get("venue", {}).get("city"),
-            "status_long": item.get("fixture", {}).get("status", {}).get("long"),
-            "status_short": item.get("fixture", {}).get("status", {}).get("short"),
-            "status_elapsed": item.get("fixture", {}).get("status", {}).get("elapsed"),
-            "league_id": item.get("league", {}).get("id"),
-            "league_name": item.get("league", {}).get("name"),
-            "league_country": item.get("league", {}).get("country"),
-            "league_season": item.get("league", {}).get("season"),
-            "league_round": item.get("league", {}).get("round"),
-            "home_team_id": item.get("teams", {}).get("home", {}).get("id"),
-            "home_team_name": item.get("teams", {}).get("home", {}).get("name"),
-            "home_team_logo": item.get("teams", {}).get("home", {}).get("logo"),
-            "home_team_winner": item.get("teams", {}).get("home", {}).get("winner"),
-            "away_team_id": item.get("teams", {}).get("away", {}).get("id"),
-            "away_team_name": item.get("teams", {}).get("away", {}).get("name"),
-            "away_team_logo": item.get("teams", {}).get("away", {}).get("logo"),
-            "away_team_winner": item.get("teams", {}).get("away", {}).get("winner"),
-            "home_goals": item.get("goals", {}).get("home"),
-            "away_goals": item.get("goals", {}).get("away"),
-            "halftime_home": item.get("score", {}).get("halftime", {}).get("home"),
-            "halftime_away": item.get("score", {}).get("halftime", {}).get("away"),
-            "fulltime_home": item.get("score", {}).get("fulltime", {}).get("home"),
-            "fulltime_away": item.get("score", {}).get("fulltime", {}).get("away"),
-            "extratime_home": item.get("score", {}).get("extratime", {}).get("home"),
-            "extratime_away": item.get("score", {}).get("extratime", {}).get("away"),
-            "penalty_home": item.get("score", {}).get("penalty", {}).get("home"),
-            "penalty_away": item.get("score", {}).get("penalty", {}).get("away")
-        }
-        for item in data.get("response", [])
-    ])
+        with self.metrics.timer("dataframe_build_seconds", "fixtures"):
+            fixtures = flatten(data.get("response", []), FIXTURE_SCHEMA)
+        if self.lake is not None:
+            self.lake.upsert("fixtures", fixtures)
+        return self._compacted(fixtures, compact_fixtures)
+
+    def _compacted(self, df, compactor):
+        """Returns df as is, or its compact fact table when compact mode is on (dims go to self.dimensions)."""
+        if not self.compact or df.empty:
+            return df
+        facts, dims = compactor(df)
+        self.dimensions.update(dims)
+        self.last_memory_report = memory_report(df, facts, dims)
+        logger.debug("Compacted %d rows: %.1f KB -> %.1f KB", len(df),
+                     self.last_memory_report["before_bytes"] / 1024, self.last_memory_report["after_bytes"] / 1024)
+        return facts
+
+    def get_fixtures_by_ids(self, ids):
+        """
+        Fixture details for a list of ids. The API takes up to 20 ids per call (dash separated),
+        so 200 fixtures cost 10 requests instead of 200. Chunks run through fetch_many.
+        """
+        ids = list(dict.fromkeys(int(i) for i in ids))  # dedupe but keep order
+        chunks = [ids[i:i + IDS_PER_CALL] for i in range(0, len(ids), IDS_PER_CALL)]
+        results = self.fetch_many([("fixtures", {"ids": "-".join(str(i) for i in chunk)}) for chunk in chunks])
+
+        items = []
+        for result in results:
+            if not result.ok:
+                logger.warning("Failed fetching fixtures %s: %s", result.params["ids"], result.error)
+                continue
+            items.extend(result.data.get("response", []))
+
+        # Put them back in the order they were asked for
+        position = {fixture_id: n for n, fixture_id in enumerate(ids)}
+        items.sort(key=lambda item: position.get(item.get("fixture", {}).get("id"), len(ids)))
+
+        with self.metrics.timer("dataframe_build_seconds", "fixtures"):
+            fixtures = flatten(items, FIXTURE_SCHEMA)
+        if self.lake is not None:
+            self.lake.upsert("fixtures", fixtures)
+        return self._compacted(fixtures, compact_fixtures)
+
+    def stream_live(self, leagues=None, live_interval: float = 15.0, idle_interval: float = 300.0, max_polls: int = None):
+        """
+        Generator over in-play changes. Polls fixtures?live=... and yields live.LiveEvent objects
+        (goal / status / elapsed / ended) only for fixtures that actually changed since the last poll.
+        Polls every live_interval seconds while something is being played, idle_interval otherwise.
+        """
+        live = "-".join(str(league) for league in leagues) if leagues else "all"
+        snapshot = {}
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            started = time.monotonic()
+            # Live data is stale after seconds, never serve it from the cache
+            data = self.api_call("fixtures", {"live": live}, cache_mode="bypass")
+            polls += 1
+
+            if data.get("response") is not None and not data.get("errors"):
+                events, snapshot = diff_live(snapshot, data["response"])
+                for event in events:
+                    yield event
+            else:
+                logger.warning("Live poll failed, keeping the last snapshot (%d fixtures)", len(snapshot))
+
+            if max_polls is not None and polls >= max_polls:
+                break
+            interval = live_interval if snapshot else idle_interval
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    async def astream_live(self, leagues=None, live_interval: float = 15.0, idle_interval: float = 300.0, max_polls: int = None):
+        """Async iterator version of stream_live, polling happens in a worker thread."""
+        stream = self.stream_live(leagues, live_interval, idle_interval, max_polls)
+        done = object()
+        while True:
+            event = await asyncio.to_thread(next, stream, done)
+            if event is done:
+                break
+            yield event
 
     def get_teams_statistics(self, league: int, season: int, team: int, date: str = None):
    
@@ -254,130 +534,141 @@ class ComprehensiveSoccerDataIngestion:
         if not response:
             return {}
     
-        return {
-        "team_id": response.get("team", {}).get("id"),
-        "team_name": response.get("team", {}).get("name"),
-        "team_logo": response.get("team", {}).get("logo"),
-        "league_id": response.get("league", {}).get("id"),
-        "league_name": response.get("league", {}).get("name"),
-        "season": response.get("league", {}).get("season"),
-        "form": response.get("form"),
-        
-        # Fixtures
-        "fixtures_played_home": response.get("fixtures", {}).get("played", {}).get("home"),
-        "fixtures_played_away": response.get("fixtures", {}).get("played", {}).get("away"),
-        "fixtures_played_total": response.get("fixtures", {}).get("played", {}).get("total"),
-        "fixtures_wins_home": response.get("fixtures", {}).get("wins", {}).get("home"),
-        "fixtures_wins_away": response.get("fixtures", {}).get("wins", {}).get("away"),
-        "fixtures_wins_total": response.get("fixtures", {}).get("wins", {}).get("total"),
-        "fixtures_draws_home": response.get("fixtures", {}).get("draws", {}).get("home"),
-        "fixtures_draws_away": response.get("fixtures", {}).get("draws", {}).get("away"),
-        "fixtures_draws_total": response.get("fixtures", {}).get("draws", {}).get("total"),
-        "fixtures_loses_home": response.get("fixtures", {}).get("loses", {}).get("home"),
-        "fixtures_loses_away": response.get("fixtures", {}).get("loses", {}).get("away"),
-        "fixtures_loses_total": response.get("fixtures", {}).get("loses", {}).get("total"),
-        
-        # Goals
-        "goals_for_total_home": response.get("goals", {}).get("for", {}).get("total", {}).get("home"),
-        "goals_for_total_away": response.get("goals", {}).get("for", {}).get("total", {}).get("away"),
-        "goals_for_total": response.get("goals", {}).get("for", {}).get("total", {}).get("total"),
-        "goals_for_avg_home": response.get("goals", {}).get("for", {}).get("average", {}).get("home"),
-        "goals_for_avg_away": response.get("goals", {}).get("for", {}).get("average", {}).get("away"),
-        "goals_for_avg_total": response.get("goals", {}).get("for", {}).get("average", {}).get("total"),
-        "goals_against_total_home": response.get("goals", {}).get("against", {}).get("total", {}).get("home"),
-        "goals_against_total_away": response.get("goals", {}).get("against", {}).get("total", {}).get("away"),
-        "goals_against_total": response.get("goals", {}).get("against", {}).get("total", {}).get("total"),
-        "goals_against_avg_home": response.get("goals", {}).get("against", {}).get("average", {}).get("home"),
-        "goals_against_avg_away": response.get("goals", {}).get("against", {}).get("average", {}).get("away"),
-        "goals_against_avg_total": response.get("goals", {}).get("against", {}).get("average", {}).get("total"),
-        
-        # "Biggest Stats lol"
-        "biggest_streak_wins": response.get("biggest", {}).get("streak", {}).get("wins"),
-        "biggest_streak_draws": response.get("biggest", {}).get("streak", {}).get("draws"),
-        "biggest_streak_loses": response.get("biggest", {}).get("streak", {}).get("loses"),
-        "biggest_wins_home": response.get("biggest", {}).get("wins", {}).get("home"),
-        "biggest_wins_away": response.get("biggest", {}).get("wins", {}).get("away"),
-        "biggest_loses_home": response.get("biggest", {}).get("loses", {}).get("home"),
-        "biggest_loses_away": response.get("biggest", {}).get("loses", {}).get("away"),
-        
-        # Clean sheets
-        "clean_sheet_home": response.get("clean_sheet", {}).get("home"),
-        "clean_sheet_away": response.get("clean_sheet", {}).get("away"),
-        "clean_sheet_total": response.get("clean_sheet", {}).get("total"),
-        
-        # Failed to score, very interesting stat imo
-        "failed_to_score_home": response.get("failed_to_score", {}).get("home"),
-        "failed_to_score_away": response.get("failed_to_score", {}).get("away"),
-        "failed_to_score_total": response.get("failed_to_score", {}).get("total"),
-        
-        # Penalty
-        "penalty_scored_total": response.get("penalty", {}).get("scored", {}).get("total"),
-        "penalty_scored_percentage": response.get("penalty", {}).get("scored", {}).get("percentage"),
-        "penalty_missed_total": response.get("penalty", {}).get("missed", {}).get("total"),
-        "penalty_missed_percentage": response.get("penalty", {}).get("missed", {}).get("percentage"),
-        
-        # Cards - extract totals from time intervals
-        "yellow_cards_total": sum([
-            response.get("cards", {}).get("yellow", {}).get(interval, {}).get("total", 0) or 0
-            for interval in ["0-15", "16-30", "31-45", "46-60", "61-75", "76-90", "91-105", "106-120"]
-        ]),
-        "red_cards_total": sum([
-            response.get("cards", {}).get("red", {}).get(interval, {}).get("total", 0) or 0
-            for interval in ["0-15", "16-30", "31-45", "46-60", "61-75", "76-90", "91-105", "106-120"]
-        ]),
-        
-        # Lineups - most used formation
-        "most_used_formation": response.get("lineups", [{}])[0].get("formation") if response.get("lineups") else None,
-        "formation_played": response.get("lineups", [{}])[0].get("played") if response.get("lineups") else None
-    }
+        with self.metrics.timer("dataframe_build_seconds", "teams/statistics"):
+            stats = team_stats_row(response)
+
+        if self.lake is not None:
+            self.lake.upsert("team_stats", pd.DataFrame([stats]), as_of=date)
+        return stats
+
+
+    def load_fixtures(self, league: int = None, season: int = None, team: int = None, refresh: bool = False):
+        """
+        Fills the local fixture store for a league-season (or a team's fixtures when no league is given).
+        Costs one API call the first time and nothing after that, unless refresh=True or the
+        stored partition still has open matches and has gone stale.
+        """
+        if league is not None:
+            scope = ("league", league, season)
+            params = {"league": league, "season": season}
+        elif team is not None:
+            scope = ("team", team, season)
+            params = {"team": team}
+            if season is not None: params["season"] = season
+        else:
+            raise ValueError("load_fixtures needs a league or a team")
+
+        if refresh or not self.fixture_store.has(scope):
+            data = self.api_call("fixtures", params)
+            if data.get("response") is not None and not data.get("errors"):
+                self.fixture_store.put(scope, data["response"])
+        return self.fixture_store.fixtures(scope)
+
+    def sync_fixtures(self, league: int, season: int):
+        """
+        Incremental refresh of a league-season. The first run downloads the whole season once,
+        after that only fixtures that arent finished yet get re-requested (by date window or ids batch).
+        Progress is checkpointed after every call so a run killed by the quota SystemExit resumes where it stopped.
+        """
+        scope = ("league", league, season)
+        checkpoint = SyncCheckpoint(os.path.join(self.cache_dir, "sync"), league, season)
+
+        if not checkpoint.pending:
+            stored = self.fixture_store.fixtures(scope)
+            if not stored:
+                # Nothing stored yet, or an empty season (not published yet / bad day), take the full season
+                checkpoint.pending = [{}]
+            else:
+                checkpoint.pending = plan_open_fixture_calls(stored)
+            checkpoint.save()
+        else:
+            logger.info("Resuming sync of league %s season %s, %d calls left", league, season, len(checkpoint.pending))
+
+        updated = 0
+        made = 0
+        while checkpoint.pending:
+            params = {"league": league, "season": season, **checkpoint.pending[0]}
+            expected = params.pop("expect", None)
+            if "ids" in params:
+                # ids cant be combined with the other filters
+                params = {"ids": params["ids"]}
+            # Open matches are exactly the ones that change, so never answer them from the cache
+            data = self.api_call("fixtures", params, cache_mode="refresh")
+            made += 1
+            checkpoint.requests += 1
+
+            if data.get("response") is None or data.get("errors"):
+                logger.warning("Sync call failed for %s, will retry on the next run", params)
+                checkpoint.save()
+                break
+
+            items = data["response"]
+            self.fixture_store.upsert(scope, items)
+            if self.lake is not None and items:
+                self.lake.upsert("fixtures", flatten(items, FIXTURE_SCHEMA))
+            updated += len(items)
+            checkpoint.pending.pop(0)
+            if expected:
+                # Fixtures rescheduled outside the window dont come back with it, get those by id
+                # or they stay stale and keep pulling the next window back to their old date
+                returned = {(item.get("fixture") or {}).get("id") for item in items}
+                missing = [i for i in expected if i not in returned]
+                if missing:
+                    logger.info("%d fixtures left the %s..%s window, fetching them by id",
+                                len(missing), params.get("from"), params.get("to"))
+                    checkpoint.pending[:0] = id_batches(missing)
+            checkpoint.save()
+
+        if not checkpoint.pending:
+            checkpoint.last_sync = time.time()
+            checkpoint.save()
 
+        open_left = sum(1 for item in self.fixture_store.fixtures(scope)
+                        if item.get("fixture", {}).get("status", {}).get("short") not in FINISHED_STATUSES)
+        logger.info("Synced league %s season %s: %d requests, %d fixtures updated, %d still open",
+                    league, season, made, updated, open_left)
+        return {"requests": made, "updated": updated, "pending": len(checkpoint.pending), "open": open_left}
+
+    def local_standings(self, league: int, season: int, date: str = None):
+        """
+        Standings as of date (YYYY-MM-DD, default latest) worked out from the stored fixtures,
+        see local_stats.py. Costs one fixtures call for the season the first time, nothing per date.
+        """
+        fixtures = flatten(self.load_fixtures(league=league, season=season), FIXTURE_SCHEMA)
+        return standings_as_of(standings_snapshots(fixtures, dates=[date] if date else None), date)
+
+    def local_team_statistics(self, league: int, season: int, team: int = None, date: str = None):
+        """Same columns as get_teams_statistics for every team (or one) as of date, from the stored fixtures."""
+        fixtures = flatten(self.load_fixtures(league=league, season=season), FIXTURE_SCHEMA)
+        return team_stats_as_of(team_stats_snapshots(fixtures), date, team)
+
+    def validate_local_stats(self, league: int, season: int, recorded_dir: str = None):
+        """
+        Compares local_standings / local_team_statistics with the real standings and teams/statistics
+        responses recorded in recorded_dir (default this client's response cache). Never calls the API
+        for those, only the season's fixtures if they arent stored. Returns (diffs, responses compared).
+        """
+        fixtures = flatten(self.load_fixtures(league=league, season=season), FIXTURE_SCHEMA)
+        diffs, compared = compare_recorded(fixtures, recorded_dir or self.cache.cache_dir)
+        logger.info("Local stats for league %s season %s: %d recorded responses compared, %d cells differ",
+                    league, season, compared, len(diffs))
+        return diffs, compared
 
     #OG H2H API call is not in our version, so need it make manual
+    # Served from the local fixture store, only the first query per league-season (or team) hits the API
     def get_h2h(self, team1_id: int, team2_id: int, league: int = None, 
-           season: int = None, last: int = None, status: str = None):
+           season: int = None, last: int = None, status: str = None, refresh: bool = False):
 
-        print(f"Fetching H2H between team {team1_id} and team {team2_id}...")
-    
-        # Get all fixtures for team1
-        params = {"team": team1_id}
-        if league is not None: params["league"] = league
-        if season is not None: params["season"] = season
-        if last is not None: params["last"] = last
-        if status: params["status"] = status
-    
-        data = self.api_call("fixtures", params)
-    
-        # Filter for matches against team2
-        h2h_matches = []
-        for item in data.get("response", []):
-            home_id = item.get("teams", {}).get("home", {}).get("id")
-            away_id = item.get("teams", {}).get("away", {}).get("id")
-        
-        # Check if team2 is involved in this match
-        if home_id == team2_id or away_id == team2_id:
-            h2h_matches.append({
-                "fixture_id": item.get("fixture", {}).get("id"),
-                "referee": item.get("fixture", {}).get("referee"),
-                "date": item.get("fixture", {}).get("date"),
-                "timestamp": item.get("fixture", {}).get("timestamp"),
-                "venue_name": item.get("fixture", {}).get("venue", {}).get("name"),
-                "venue_city": item.get("fixture", {}).get("venue", {}).get("city"),
-                "status": item.get("fixture", {}).get("status", {}).get("long"),
-                "league_name": item.get("league", {}).get("name"),
-                "league_round": item.get("league", {}).get("round"),
-                "home_team_id": home_id,
-                "home_team_name": item.get("teams", {}).get("home", {}).get("name"),
-                "home_team_winner": item.get("teams", {}).get("home", {}).get("winner"),
-                "away_team_id": away_id,
-                "away_team_name": item.get("teams", {}).get("away", {}).get("name"),
-                "away_team_winner": item.get("teams", {}).get("away", {}).get("winner"),
-                "home_goals": item.get("goals", {}).get("home"),
-                "away_goals": item.get("goals", {}).get("away"),
-                "winner": (item.get("teams", {}).get("home", {}).get("name") 
-                          if item.get("teams", {}).get("home", {}).get("winner") 
-                          else (item.get("teams", {}).get("away", {}).get("name") 
-                               if item.get("teams", {}).get("away", {}).get("winner") 
-                               else "Draw"))
-            })
-    
-        return pd.DataFrame(h2h_matches)
\ No newline at end of file
+        logger.info("Fetching H2H between team %s and team %s...", team1_id, team2_id)
+
+        if league is not None:
+            self.load_fixtures(league=league, season=season, refresh=refresh)
+        else:
+            self.load_fixtures(team=team1_id, season=season, refresh=refresh)
+
+        items = self.fixture_store.h2h(team1_id, team2_id, league=league, season=season, status=status, last=last)
+
+        with self.metrics.timer("dataframe_build_seconds", "h2h"):
+            h2h = flatten(items, H2H_SCHEMA)
+            h2h["winner"] = h2h_winner(h2h)
+        return h2h
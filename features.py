@@ -0,0 +1,279 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import PLAYED_STATUSES, atomic_write_json
+
+# Pre-match model features for every fixture in a FIXTURE_SCHEMA frame (get_fixtures / the lake).
+# Everything is computed from matches that finished before kickoff. FeaturePipeline keeps just
+# enough state (last few matches per team, EWM means, Elo ratings, head-to-head totals) that new
+# results get folded in without recomputing past seasons.
+
+ROLLING_WINDOWS = (5, 10)
+EWM_SPAN = 10
+ELO_START = 1500.0
+ELO_K = 20.0
+ELO_HOME_ADVANTAGE = 60.0
+
+
+def _team_rows(fixtures):
+    """Two rows per fixture (home side, away side) with the result from that team's point of view."""
+    finished = fixtures["status_short"].isin(PLAYED_STATUSES).to_numpy()
+    home_goals = fixtures["home_goals"].to_numpy(dtype=float, na_value=np.nan)
+    away_goals = fixtures["away_goals"].to_numpy(dtype=float, na_value=np.nan)
+    sides = []
+    for home, team, gf, ga in ((True, "home_team_id", home_goals, away_goals), (False, "away_team_id", away_goals, home_goals)):
+        sides.append(pd.DataFrame({
+            "fixture_id": fixtures["fixture_id"].to_numpy(dtype=np.int64),
+            "timestamp": fixtures["timestamp"].to_numpy(dtype=np.int64),
+            "team_id": fixtures[team].to_numpy(dtype=np.int64),
+            "home": home,
+            "finished": finished,
+            "goals_for": np.where(finished, gf, np.nan),
+            "goals_against": np.where(finished, ga, np.nan),
+        }))
+    rows = pd.concat(sides, ignore_index=True)
+    rows["points"] = np.select([rows["goals_for"] > rows["goals_against"], rows["goals_for"] == rows["goals_against"]],
+                               [3.0, 1.0], 0.0)
+    rows.loc[~rows["finished"], "points"] = np.nan
+    return rows
+
+
+def _rolling_means(rows, keys, windows, prefix):
+    """
+    Mean points/goals over each row's last w matches (the row included), per keys group.
+    Done as cumsum minus the cumsum w rows back so it stays one grouped pass per window.
+    """
+    out = {}
+    grouped = rows.groupby(keys, sort=False)
+    position = grouped.cumcount().to_numpy() + 1
+    sums = grouped[["points", "goals_for", "goals_against"]].cumsum()
+    for w in windows:
+        back = sums.groupby([rows[k] for k in keys], sort=False).shift(w).fillna(0.0)
+        count = np.minimum(position, w)
+        for column, name in (("points", "form"), ("goals_for", "goals_for"), ("goals_against", "goals_against")):
+            out[f"{prefix}{name}_{w}"] = (sums[column] - back[column]).to_numpy() / count
+    return pd.DataFrame(out, index=rows.index)
+
+
+def _asof(left, right, by, columns):
+    """For every left row the right values from the latest right row strictly before its kickoff."""
+    merged = pd.merge_asof(left[["timestamp"] + by].reset_index().sort_values("timestamp"),
+                           right[["timestamp"] + by + columns].sort_values("timestamp"),
+                           on="timestamp", by=by, allow_exact_matches=False)
+    return merged.set_index("index")[columns].reindex(left.index)
+
+
+class FeaturePipeline:
+    """
+    features = pipeline.update(fixtures) gives one row per fixture that hasnt been folded in yet
+    (upcoming ones included) and folds the newly finished ones into the state, so the next update
+    only does the work for what is new. A fresh pipeline on the full history is the from-scratch build.
+    Results should arrive roughly in kickoff order, a result older than what is already folded
+    only counts from then on (call reset() and rebuild if old data got corrected).
+    """
+
+    def __init__(self, windows=ROLLING_WINDOWS, ewm_span: int = EWM_SPAN, elo_k: float = ELO_K,
+                 home_advantage: float = ELO_HOME_ADVANTAGE):
+        self.windows = tuple(windows)
+        self.ewm_span = ewm_span
+        self.elo_k = elo_k
+        self.home_advantage = home_advantage
+        self.reset()
+
+    def reset(self):
+        # Last max(windows) finished matches per team and venue, enough for every rolling window
+        self.history = pd.DataFrame({"fixture_id": pd.Series(dtype=np.int64), "timestamp": pd.Series(dtype=np.int64),
+                                     "team_id": pd.Series(dtype=np.int64), "home": pd.Series(dtype=bool),
+                                     "points": pd.Series(dtype=float), "goals_for": pd.Series(dtype=float),
+                                     "goals_against": pd.Series(dtype=float)})
+        # team_id -> [ewm goals for, ewm goals against, elo]
+        self.teams = pd.DataFrame({"ewm_goals_for": pd.Series(dtype=float), "ewm_goals_against": pd.Series(dtype=float),
+                                   "elo": pd.Series(dtype=float)}, index=pd.Index([], dtype=np.int64, name="team_id"))
+        # (lower team id, higher team id) -> meetings so far
+        self.pairs = pd.DataFrame({"played": pd.Series(dtype=float), "low_wins": pd.Series(dtype=float),
+                                   "draws": pd.Series(dtype=float), "high_wins": pd.Series(dtype=float),
+                                   "goals": pd.Series(dtype=float)},
+                                  index=pd.MultiIndex.from_arrays([[], []], names=["team_low", "team_high"]))
+        self.folded = set()
+
+    # Feature blocks, each gets the new team rows / fixtures and returns columns for them
+
+    def _form_features(self, rows, new_results):
+        keep = ["fixture_id", "timestamp", "team_id", "home", "points", "goals_for", "goals_against"]
+        played = pd.concat([self.history, new_results[keep]], ignore_index=True)
+        played = played.sort_values(["team_id", "timestamp"], kind="mergesort").reset_index(drop=True)
+
+        overall = pd.concat([played, _rolling_means(played, ["team_id"], self.windows, "")], axis=1)
+        venue = pd.concat([played, _rolling_means(played, ["team_id", "home"], self.windows, "venue_")], axis=1)
+        overall = overall.rename(columns={"timestamp": "last_kickoff"}).assign(timestamp=overall["timestamp"])
+
+        form_columns = [c for c in overall.columns if c.startswith(("form_", "goals_for_", "goals_against_"))]
+        venue_columns = [c for c in venue.columns if c.startswith("venue_")]
+        out = _asof(rows, overall, ["team_id"], form_columns + ["last_kickoff"])
+        out[venue_columns] = _asof(rows, venue, ["team_id", "home"], venue_columns)
+        out["rest_days"] = (rows["timestamp"] - out.pop("last_kickoff")) / 86400.0
+        return out, played
+
+    def _ewm_features(self, rows, new_results):
+        # Seed every team with its saved EWM mean, with adjust=False that continues the series exactly
+        seeds = self.teams[["ewm_goals_for", "ewm_goals_against"]].dropna().reset_index()
+        seeds["timestamp"] = np.iinfo(np.int64).min
+        series = pd.concat([seeds.rename(columns={"ewm_goals_for": "goals_for", "ewm_goals_against": "goals_against"}),
+                            new_results[["team_id", "timestamp", "goals_for", "goals_against"]]], ignore_index=True)
+        series = series.sort_values(["team_id", "timestamp"], kind="mergesort").reset_index(drop=True)
+        means = (series.groupby("team_id", sort=False)[["goals_for", "goals_against"]]
+                 .ewm(span=self.ewm_span, adjust=False).mean().reset_index(level=0, drop=True))
+        series["ewm_goals_for"] = means["goals_for"]
+        series["ewm_goals_against"] = means["goals_against"]
+        out = _asof(rows, series, ["team_id"], ["ewm_goals_for", "ewm_goals_against"])
+        return out, series.groupby("team_id").tail(1).set_index("team_id")[["ewm_goals_for", "ewm_goals_against"]]
+
+    def _elo_features(self, fixtures):
+        """
+        Elo is sequential by nature, so it runs one match day at a time: every match of the day
+        reads the ratings from before the day and all of them update together with array ops.
+        """
+        teams = pd.Index(np.union1d(self.teams.index.to_numpy(),
+                                    np.concatenate([fixtures["home_team_id"].to_numpy(dtype=np.int64),
+                                                    fixtures["away_team_id"].to_numpy(dtype=np.int64)])))
+        ratings = np.full(len(teams), ELO_START)
+        known = self.teams["elo"].dropna()
+        ratings[teams.get_indexer(known.index)] = known.to_numpy()
+
+        home = teams.get_indexer(fixtures["home_team_id"].to_numpy(dtype=np.int64))
+        away = teams.get_indexer(fixtures["away_team_id"].to_numpy(dtype=np.int64))
+        finished = fixtures["status_short"].isin(PLAYED_STATUSES).to_numpy()
+        hg = fixtures["home_goals"].to_numpy(dtype=float, na_value=np.nan)
+        ag = fixtures["away_goals"].to_numpy(dtype=float, na_value=np.nan)
+        score = np.where(hg > ag, 1.0, np.where(hg == ag, 0.5, 0.0))
+        day = fixtures["timestamp"].to_numpy(dtype=np.int64) // 86400
+
+        home_elo = np.empty(len(fixtures))
+        away_elo = np.empty(len(fixtures))
+        order = np.argsort(day, kind="stable")
+        bounds = np.flatnonzero(np.diff(day[order])) + 1
+        for batch in np.split(order, bounds):
+            home_elo[batch] = ratings[home[batch]]
+            away_elo[batch] = ratings[away[batch]]
+            done = batch[finished[batch]]
+            if not len(done):
+                continue
+            expected = 1.0 / (1.0 + 10 ** ((ratings[away[done]] - ratings[home[done]] - self.home_advantage) / 400.0))
+            change = self.elo_k * (score[done] - expected)
+            np.add.at(ratings, home[done], change)
+            np.add.at(ratings, away[done], -change)
+
+        out = pd.DataFrame({"home_elo": home_elo, "away_elo": away_elo}, index=fixtures.index)
+        out["elo_diff"] = out["home_elo"] - out["away_elo"]
+        out["elo_home_win_prob"] = 1.0 / (1.0 + 10 ** (-(out["elo_diff"] + self.home_advantage) / 400.0))
+        return out, pd.Series(ratings, index=teams, name="elo")
+
+    def _h2h_features(self, fixtures):
+        """Meetings between the two teams before kickoff, from the home team's side."""
+        home = fixtures["home_team_id"].to_numpy(dtype=np.int64)
+        away = fixtures["away_team_id"].to_numpy(dtype=np.int64)
+        low, high = np.minimum(home, away), np.maximum(home, away)
+        finished = fixtures["status_short"].isin(PLAYED_STATUSES).to_numpy()
+        hg = fixtures["home_goals"].to_numpy(dtype=float, na_value=np.nan)
+        ag = fixtures["away_goals"].to_numpy(dtype=float, na_value=np.nan)
+        low_goals = np.where(home == low, hg, ag)
+        high_goals = np.where(home == low, ag, hg)
+
+        meetings = pd.DataFrame({
+            "team_low": low, "team_high": high, "timestamp": fixtures["timestamp"].to_numpy(dtype=np.int64),
+            "played": finished.astype(float),
+            "low_wins": (finished & (low_goals > high_goals)).astype(float),
+            "draws": (finished & (low_goals == high_goals)).astype(float),
+            "high_wins": (finished & (low_goals < high_goals)).astype(float),
+            "goals": np.where(finished, low_goals + high_goals, 0.0),
+        }, index=fixtures.index).sort_values(["team_low", "team_high", "timestamp"], kind="mergesort")
+        values = ["played", "low_wins", "draws", "high_wins", "goals"]
+
+        # Running totals within this batch (excluding the match itself) plus what the state already had
+        running = meetings.groupby(["team_low", "team_high"], sort=False)[values].cumsum() - meetings[values]
+        before = self.pairs.reindex(pd.MultiIndex.from_arrays([meetings["team_low"], meetings["team_high"]]))
+        prior = running + before.fillna(0.0).to_numpy()
+        prior = prior.reindex(fixtures.index)
+
+        home_is_low = home == low
+        out = pd.DataFrame({
+            "h2h_played": prior["played"],
+            "h2h_home_wins": np.where(home_is_low, prior["low_wins"], prior["high_wins"]),
+            "h2h_draws": prior["draws"],
+            "h2h_away_wins": np.where(home_is_low, prior["high_wins"], prior["low_wins"]),
+            "h2h_goals_avg": np.divide(prior["goals"].to_numpy(), prior["played"].to_numpy(),
+                                       out=np.full(len(prior), np.nan), where=prior["played"].to_numpy() > 0),
+        }, index=fixtures.index)
+        totals = meetings.groupby(["team_low", "team_high"])[values].sum()
+        return out, self.pairs.add(totals, fill_value=0.0)
+
+    # Public
+
+    def update(self, fixtures):
+        """
+        Features for every fixture in fixtures that isnt folded in yet, then folds the finished ones.
+        Returns a frame keyed by fixture_id with home_*/away_* feature columns.
+        """
+        fixtures = fixtures[~fixtures["fixture_id"].isin(self.folded)]
+        fixtures = fixtures.dropna(subset=["fixture_id", "timestamp", "home_team_id", "away_team_id"])
+        fixtures = fixtures.sort_values("timestamp", kind="mergesort").reset_index(drop=True)
+        if fixtures.empty:
+            return pd.DataFrame()
+
+        rows = _team_rows(fixtures)
+        new_results = rows[rows["finished"]]
+
+        form, played = self._form_features(rows, new_results)
+        ewm, ewm_state = self._ewm_features(rows, new_results)
+        team_features = pd.concat([form, ewm], axis=1)
+        elo, ratings = self._elo_features(fixtures)
+        h2h, pairs = self._h2h_features(fixtures)
+
+        n = len(fixtures)
+        out = fixtures[["fixture_id", "timestamp", "league_id", "league_season", "home_team_id", "away_team_id",
+                        "status_short", "home_goals", "away_goals"]].copy()
+        for side, part in (("home", team_features.iloc[:n]), ("away", team_features.iloc[n:])):
+            part = part.add_prefix(f"{side}_")
+            part.index = out.index
+            out = pd.concat([out, part], axis=1)
+        out = pd.concat([out, elo, h2h], axis=1)
+
+        # Fold the finished ones in
+        depth = max(self.windows)
+        self.history = played.groupby(["team_id", "home"], sort=False).tail(depth).reset_index(drop=True)
+        teams = ewm_state.combine_first(self.teams[["ewm_goals_for", "ewm_goals_against"]])
+        teams["elo"] = ratings
+        self.teams = teams.rename_axis("team_id")
+        self.pairs = pairs
+        self.folded.update(int(i) for i in new_results["fixture_id"])
+        return out
+
+    def save(self, directory):
+        """State as parquet + a small json, so the next run can pick up with load()."""
+        os.makedirs(directory, exist_ok=True)
+        self.history.to_parquet(os.path.join(directory, "history.parquet"), index=False)
+        self.teams.reset_index().to_parquet(os.path.join(directory, "teams.parquet"), index=False)
+        self.pairs.reset_index().to_parquet(os.path.join(directory, "pairs.parquet"), index=False)
+        atomic_write_json(os.path.join(directory, "pipeline.json"), {
+            "windows": list(self.windows), "ewm_span": self.ewm_span, "elo_k": self.elo_k,
+            "home_advantage": self.home_advantage, "folded": sorted(self.folded),
+        })
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "pipeline.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        pipeline = cls(config["windows"], config["ewm_span"], config["elo_k"], config["home_advantage"])
+        pipeline.history = pd.read_parquet(os.path.join(directory, "history.parquet"))
+        pipeline.teams = pd.read_parquet(os.path.join(directory, "teams.parquet")).set_index("team_id")
+        pipeline.pairs = pd.read_parquet(os.path.join(directory, "pairs.parquet")).set_index(["team_low", "team_high"])
+        pipeline.folded = set(config["folded"])
+        return pipeline
+
+
+def build_features(fixtures, **kwargs):
+    """One-off features for a whole fixtures frame, same as a fresh FeaturePipeline().update(fixtures)."""
+    return FeaturePipeline(**kwargs).update(fixtures)
@@ -0,0 +1,222 @@
+import json
+import os
+import time
+
+from cache import FINISHED_STATUSES, atomic_write_json
+
+# Partitions that still have unfinished matches get refetched after this long
+OPEN_PARTITION_MAX_AGE = 6 * 60 * 60
+
+
+def pair_key(team1_id, team2_id):
+    """Unordered (home, away) key so A vs B and B vs A land in the same bucket."""
+    return (min(team1_id, team2_id), max(team1_id, team2_id))
+
+
+def _status(item):
+    return (item.get("fixture") or {}).get("status", {}).get("short")
+
+
+class FixtureStore:
+    """
+    Raw fixture JSON kept on disk per scope, e.g. ("league", 39, 2024) for a whole league-season
+    or ("team", 33, 2024) for one team's season. Everything loaded gets indexed by fixture id and
+    by unordered team pair so H2H lookups dont need the API at all.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._fixtures = {}   # fixture_id -> raw item
+        self._pairs = {}      # (lo_team, hi_team) -> set of fixture ids
+        self._partitions = {}  # scope -> {"fetched_at": ..., "ids": [...]}
+        self._loaded = False
+
+    @staticmethod
+    def scope_name(scope):
+        return "_".join(str(part) for part in scope)
+
+    def _path(self, scope):
+        return os.path.join(self.store_dir, f"{self.scope_name(scope)}.json")
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        for name in sorted(os.listdir(self.store_dir)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.store_dir, name), "r", encoding="utf-8") as f:
+                    partition = json.load(f)
+            except (OSError, ValueError):
+                continue  # broken file, it will just get refetched
+            self._index(tuple(partition["scope"]), partition.get("fetched_at", 0), partition.get("fixtures", []))
+
+    def _lookup(self, scope):
+        """Partition for scope, also picking up a file another process wrote after we loaded."""
+        self._ensure_loaded()
+        scope = tuple(scope)
+        partition = self._partitions.get(scope)
+        if partition is None and os.path.exists(self._path(scope)):
+            try:
+                with open(self._path(scope), "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._index(scope, stored.get("fetched_at", 0), stored.get("fixtures", []))
+            partition = self._partitions.get(scope)
+        return partition
+
+    def _index(self, scope, fetched_at, items):
+        ids = []
+        for item in items:
+            fixture_id = (item.get("fixture") or {}).get("id")
+            if fixture_id is None:
+                continue
+            self._fixtures[fixture_id] = item
+            ids.append(fixture_id)
+            home_id = (item.get("teams") or {}).get("home", {}).get("id")
+            away_id = (item.get("teams") or {}).get("away", {}).get("id")
+            if home_id is not None and away_id is not None:
+                self._pairs.setdefault(pair_key(home_id, away_id), set()).add(fixture_id)
+        self._partitions[scope] = {"fetched_at": fetched_at, "ids": ids}
+
+    def has(self, scope, max_age: float = OPEN_PARTITION_MAX_AGE):
+        """
+        True if the scope is stored and either fully finished or fetched recently enough.
+        An empty partition (season not out yet) only counts for max_age like an open one.
+        """
+        partition = self._lookup(scope)
+        if partition is None:
+            return False
+        if partition["ids"] and all(_status(self._fixtures[i]) in FINISHED_STATUSES for i in partition["ids"]):
+            return True
+        return time.time() - partition["fetched_at"] < max_age
+
+    def put(self, scope, items):
+        """Stores (or replaces) every fixture of a scope."""
+        self._ensure_loaded()
+        scope = tuple(scope)
+        fetched_at = time.time()
+        atomic_write_json(self._path(scope), {"scope": list(scope), "fetched_at": fetched_at, "fixtures": items})
+        self._index(scope, fetched_at, items)
+
+    def upsert(self, scope, items):
+        """Merges items into an existing scope by fixture id, newer items win."""
+        self._ensure_loaded()
+        scope = tuple(scope)
+        partition = self._partitions.get(scope)
+        merged = {i: self._fixtures[i] for i in partition["ids"]} if partition else {}
+        for item in items:
+            fixture_id = (item.get("fixture") or {}).get("id")
+            if fixture_id is not None:
+                merged[fixture_id] = item
+        self.put(scope, list(merged.values()))
+
+    def partition(self, scope):
+        """{"fetched_at", "ids"} for a stored scope, None if it was never stored."""
+        return self._lookup(scope)
+
+    def fixtures(self, scope):
+        partition = self._lookup(scope)
+        return [self._fixtures[i] for i in partition["ids"]] if partition else []
+
+    def h2h(self, team1_id, team2_id, league: int = None, season: int = None,
+            status: str = None, last: int = None, date_from: str = None, date_to: str = None):
+        """
+        Indexed H2H lookup, oldest first. status takes API style short codes ("FT" or "FT-AET-PEN"),
+        last keeps only the N most recent finished matches like the API does.
+        """
+        self._ensure_loaded()
+        items = [self._fixtures[i] for i in self._pairs.get(pair_key(team1_id, team2_id), ())]
+
+        if league is not None:
+            items = [it for it in items if (it.get("league") or {}).get("id") == league]
+        if season is not None:
+            items = [it for it in items if (it.get("league") or {}).get("season") == season]
+        if date_from:
+            items = [it for it in items if ((it.get("fixture") or {}).get("date") or "")[:10] >= date_from]
+        if date_to:
+            items = [it for it in items if ((it.get("fixture") or {}).get("date") or "")[:10] <= date_to]
+        if status:
+            wanted = set(status.split("-"))
+            items = [it for it in items if _status(it) in wanted]
+
+        items.sort(key=lambda it: (it.get("fixture") or {}).get("timestamp") or 0)
+        if last is not None:
+            items = [it for it in items if _status(it) in FINISHED_STATUSES][-last:] if last > 0 else []
+        return items
+
+
+# Open matches whose kickoff date cant be trusted anymore, these get looked up by id
+RESCHEDULE_STATUSES = {"TBD", "PST", "SUSP", "INT", "ABD"}
+IDS_PER_CALL = 20  # API limit for the ids param
+
+
+class SyncCheckpoint:
+    """
+    Progress of a fixtures sync for one league-season, saved after every request.
+    pending holds the planned calls that havent gone through yet, so a run that died halfway
+    (quota SystemExit, crash, ctrl-c) picks up exactly those next time.
+    """
+
+    def __init__(self, checkpoint_dir, league, season):
+        self.path = os.path.join(checkpoint_dir, f"{league}_{season}.json")
+        self.league = league
+        self.season = season
+        self.pending = []
+        self.last_sync = None
+        self.requests = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.pending = state.get("pending", [])
+            self.last_sync = state.get("last_sync")
+            self.requests = state.get("requests", 0)
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        atomic_write_json(self.path, {
+            "league": self.league,
+            "season": self.season,
+            "pending": self.pending,
+            "last_sync": self.last_sync,
+            "requests": self.requests,
+        })
+
+
+def id_batches(ids):
+    """Splits fixture ids into {"ids": "1-2-3"} params of at most IDS_PER_CALL each."""
+    ids = sorted(ids)
+    return [{"ids": "-".join(str(i) for i in ids[i:i + IDS_PER_CALL])} for i in range(0, len(ids), IDS_PER_CALL)]
+
+
+def plan_open_fixture_calls(items, now: float = None, lookahead: float = 24 * 60 * 60):
+    """
+    Works out the fewest calls that refresh every open fixture that could have changed.
+    Returns a list of param dicts, each either {"ids": "1-2-3"} or {"from": date, "to": date, "expect": [ids]}.
+    expect is not sent, it lists the fixtures the window should bring back so the ones that moved
+    out of it (rescheduled) can be fetched by id afterwards.
+    Matches kicking off later than now + lookahead are left alone since nothing has happened yet.
+    """
+    now = time.time() if now is None else now
+    dated, unsettled = [], []
+    for item in items:
+        status = _status(item)
+        if status in FINISHED_STATUSES:
+            continue
+        fixture = item.get("fixture") or {}
+        if status in RESCHEDULE_STATUSES:
+            unsettled.append(fixture["id"])
+        elif (fixture.get("timestamp") or 0) <= now + lookahead:
+            dated.append(fixture)
+
+    everything_by_id = id_batches([f["id"] for f in dated] + unsettled)
+    # One from/to window covers any number of dated matches, use it once ids would need more calls
+    if dated and len(everything_by_id) > 1 + len(id_batches(unsettled)):
+        dates = sorted((f.get("date") or "")[:10] for f in dated)
+        window = {"from": dates[0], "to": dates[-1], "expect": sorted(f["id"] for f in dated)}
+        return [window] + id_batches(unsettled)
+    return everything_by_id
@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+
+# Event kinds yielded by stream_live
+GOAL = "goal"
+STATUS = "status"
+ELAPSED = "elapsed"
+ENDED = "ended"
+
+
+@dataclass
+class LiveEvent:
+    kind: str  # goal / status / elapsed / ended
+    fixture_id: int
+    old: object
+    new: object
+    item: dict = None  # raw fixture from the latest poll (None for ended)
+
+
+def snapshot_of(item):
+    """The small tuple that gets compared between polls: (status, elapsed, home goals, away goals)."""
+    fixture = item.get("fixture") or {}
+    status = fixture.get("status") or {}
+    goals = item.get("goals") or {}
+    return (status.get("short"), status.get("elapsed"), goals.get("home"), goals.get("away"))
+
+
+def diff_live(previous, items):
+    """
+    Compares a poll of live fixtures against the previous snapshot dict (fixture_id -> tuple).
+    Returns (events, new_snapshot). Fixtures that drop out of the live feed get an ended event.
+    """
+    events = []
+    current = {}
+    for item in items:
+        fixture_id = (item.get("fixture") or {}).get("id")
+        if fixture_id is None:
+            continue
+        snap = snapshot_of(item)
+        current[fixture_id] = snap
+        old = previous.get(fixture_id)
+        if old == snap:
+            continue  # nothing changed, nothing to do
+
+        old_status, old_elapsed, old_home, old_away = old if old else (None, None, None, None)
+        status, elapsed, home, away = snap
+        if old is None or old_status != status:
+            events.append(LiveEvent(STATUS, fixture_id, old_status, status, item))
+        if old is not None and (old_home, old_away) != (home, away):
+            events.append(LiveEvent(GOAL, fixture_id, (old_home, old_away), (home, away), item))
+        if old_elapsed != elapsed:
+            events.append(LiveEvent(ELAPSED, fixture_id, old_elapsed, elapsed, item))
+
+    for fixture_id, old in previous.items():
+        if fixture_id not in current:
+            events.append(LiveEvent(ENDED, fixture_id, old[0], None))
+    return events, current
@@ -0,0 +1,327 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from cache import PLAYED_STATUSES
+from schemas import STANDINGS_SCHEMA, flatten, standings_rows, team_stats_row
+
+# Standings and teams/statistics computed from stored fixtures instead of the API, so
+# backtests can ask for "as of matchday N" without one call per team per date.
+# Input is a FIXTURE_SCHEMA frame (flatten(items, FIXTURE_SCHEMA)), column names of the
+# output match STANDINGS_SCHEMA / TEAM_STATS_SCHEMA so the frames can be swapped for the API ones.
+
+TEAM_KEY = ["league_id", "season", "team_id"]
+STANDINGS_COLUMNS = ["league_id", "season", "as_of", "rank", "team_id", "team_name", "team_logo", "points", "goalsDiff",
+                     "group", "form", "played", "win", "draw", "lose", "goals_for", "goals_against",
+                     "home_played", "home_win", "home_draw", "home_lose", "away_played", "away_win", "away_draw",
+                     "away_lose"]
+
+
+def team_matches(fixtures):
+    """Two rows per finished fixture, one from each team's side, sorted by team then kickoff."""
+    df = fixtures[fixtures["status_short"].isin(PLAYED_STATUSES)]
+    common = {
+        "fixture_id": df["fixture_id"].to_numpy(),
+        "timestamp": df["timestamp"].to_numpy(),
+        "as_of": df["date"].str[:10].to_numpy(),
+        "league_id": df["league_id"].to_numpy(),
+        "league_name": df["league_name"].to_numpy(),
+        "season": df["league_season"].to_numpy(),
+    }
+    home_goals = df["home_goals"].fillna(0).to_numpy(dtype=np.int64)
+    away_goals = df["away_goals"].fillna(0).to_numpy(dtype=np.int64)
+    sides = []
+    for side, gf, ga in (("home", home_goals, away_goals), ("away", away_goals, home_goals)):
+        sides.append(pd.DataFrame({
+            **common,
+            "team_id": df[f"{side}_team_id"].to_numpy(),
+            "team_name": df[f"{side}_team_name"].to_numpy(),
+            "team_logo": df[f"{side}_team_logo"].to_numpy(),
+            "home": side == "home",
+            "goals_for": gf,
+            "goals_against": ga,
+        }))
+    rows = pd.concat(sides, ignore_index=True)
+    rows = rows.sort_values(TEAM_KEY + ["timestamp", "fixture_id"], kind="mergesort").reset_index(drop=True)
+    rows["result"] = np.select([rows["goals_for"] > rows["goals_against"], rows["goals_for"] < rows["goals_against"]],
+                               ["W", "L"], "D")
+    return rows
+
+
+def _group_bounds(rows):
+    """(start, end) row positions of every team-season block in a team_matches frame."""
+    keys = rows[TEAM_KEY].to_numpy()
+    changed = np.ones(len(rows), dtype=bool)
+    changed[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+    starts = np.flatnonzero(changed)
+    return zip(starts, np.append(starts[1:], len(rows)))
+
+
+def _form(rows):
+    """Results so far as one string per row, oldest first (the teams/statistics order)."""
+    results = rows["result"].to_numpy()
+    form = np.empty(len(rows), dtype=object)
+    for start, end in _group_bounds(rows):
+        season_form = "".join(results[start:end])
+        form[start:end] = [season_form[:k] for k in range(1, end - start + 1)]
+    return form
+
+
+def _cumulative(rows, columns):
+    """Running totals per team-season for a dict of name -> per-match values, in one grouped cumsum."""
+    values = pd.DataFrame(columns, index=rows.index)
+    keys = [rows[k] for k in TEAM_KEY]
+    return values.groupby(keys, sort=False).cumsum()
+
+
+def _split_counts(rows):
+    home = rows["home"].to_numpy()
+    away = ~home
+    gf = rows["goals_for"].to_numpy()
+    ga = rows["goals_against"].to_numpy()
+    result = rows["result"].to_numpy()
+    per_match = {}
+    for name, values in (("played", np.ones(len(rows), dtype=np.int64)),
+                         ("win", (result == "W").astype(np.int64)),
+                         ("draw", (result == "D").astype(np.int64)),
+                         ("lose", (result == "L").astype(np.int64)),
+                         ("goals_for", gf), ("goals_against", ga),
+                         ("clean_sheet", (ga == 0).astype(np.int64)),
+                         ("failed_to_score", (gf == 0).astype(np.int64))):
+        per_match[f"{name}_home"] = values * home
+        per_match[f"{name}_away"] = values * away
+    totals = _cumulative(rows, per_match)
+    for name in ("played", "win", "draw", "lose", "goals_for", "goals_against", "clean_sheet", "failed_to_score"):
+        totals[f"{name}_total"] = totals[f"{name}_home"] + totals[f"{name}_away"]
+    return totals
+
+
+def _longest_streaks(rows):
+    """Longest run of W / D / L so far, per row."""
+    result = rows["result"]
+    team = rows[TEAM_KEY]
+    new_block = (result != result.shift()) | (team != team.shift()).any(axis=1)
+    block = new_block.cumsum()
+    keys = [rows[k] for k in TEAM_KEY]
+    streaks = {}
+    for letter, name in (("W", "wins"), ("D", "draws"), ("L", "loses")):
+        run = (result == letter).astype(np.int64).groupby(block).cumsum()
+        streaks[f"biggest_streak_{name}"] = run.groupby(keys, sort=False).cummax()
+    return pd.DataFrame(streaks)
+
+
+def _biggest(rows, wanted, side):
+    """
+    Biggest win/loss so far at home or away as a "home-away" scoreline (None if there wasnt one).
+    margin*100 + goals encodes "bigger margin first, then more goals" so a grouped cummax finds it.
+    """
+    gf = rows["goals_for"].to_numpy()
+    ga = rows["goals_against"].to_numpy()
+    at_side = rows["home"].to_numpy() if side == "home" else ~rows["home"].to_numpy()
+    if wanted == "W":
+        key = np.where((rows["result"].to_numpy() == "W") & at_side, (gf - ga) * 100 + gf, -1)
+    else:
+        key = np.where((rows["result"].to_numpy() == "L") & at_side, (ga - gf) * 100 + ga, -1)
+    best = pd.Series(key, index=rows.index).groupby([rows[k] for k in TEAM_KEY], sort=False).cummax().to_numpy()
+
+    margin, goals = best // 100, best % 100
+    # goals is the winner's tally for wins and the opponent's for losses
+    team_goals = goals if wanted == "W" else goals - margin
+    other_goals = goals - margin if wanted == "W" else goals
+    home_goals, away_goals = (team_goals, other_goals) if side == "home" else (other_goals, team_goals)
+    scores = np.char.add(np.char.add(home_goals.astype(str), "-"), away_goals.astype(str)).astype(object)
+    scores[best < 0] = None
+    return scores
+
+
+def team_stats_snapshots(fixtures):
+    """
+    Every teams/statistics snapshot for the seasons in fixtures, one row per team per match played,
+    holding the numbers as they stood after that match (as_of is the match day, YYYY-MM-DD).
+    """
+    rows = team_matches(fixtures)
+    totals = _split_counts(rows)
+    out = rows[["team_id", "team_name", "team_logo", "league_id", "league_name", "season", "as_of", "fixture_id"]].copy()
+    out["form"] = _form(rows)
+
+    names = {"played": "played", "win": "wins", "draw": "draws", "lose": "loses"}
+    for ours, api in names.items():
+        for part in ("home", "away", "total"):
+            out[f"fixtures_{api}_{part}"] = totals[f"{ours}_{part}"]
+
+    for kind in ("for", "against"):
+        out[f"goals_{kind}_total_home"] = totals[f"goals_{kind}_home"]
+        out[f"goals_{kind}_total_away"] = totals[f"goals_{kind}_away"]
+        out[f"goals_{kind}_total"] = totals[f"goals_{kind}_total"]
+        for part in ("home", "away", "total"):
+            played = totals[f"played_{part}"].to_numpy()
+            goals = totals[f"goals_{kind}_{part}"].to_numpy()
+            average = np.divide(goals, played, out=np.zeros(len(goals)), where=played > 0)
+            out[f"goals_{kind}_avg_{part}"] = average.round(1)
+
+    out = pd.concat([out, _longest_streaks(rows)], axis=1)
+    for wanted, name in (("W", "wins"), ("L", "loses")):
+        for side in ("home", "away"):
+            out[f"biggest_{name}_{side}"] = _biggest(rows, wanted, side)
+
+    for name in ("clean_sheet", "failed_to_score"):
+        for part in ("home", "away", "total"):
+            out[f"{name}_{part}"] = totals[f"{name}_{part}"]
+    return out
+
+
+def team_stats_as_of(snapshots, date: str = None, team: int = None):
+    """Latest snapshot per team on or before date (YYYY-MM-DD), like teams/statistics?date=..."""
+    snap = snapshots if date is None else snapshots[snapshots["as_of"] <= date]
+    if team is not None:
+        snap = snap[snap["team_id"] == team]
+    return snap.groupby(TEAM_KEY, sort=False).tail(1).reset_index(drop=True)
+
+
+def standings_snapshots(fixtures, dates=None):
+    """
+    Standings for every match day of every league-season in fixtures (or for the given dates),
+    one row per team per day. Ranked on points, goal difference, then goals scored.
+    group is just the league name, the whole league-season is one table. Competitions the API
+    splits into groups (cups, Champions League stages) get separate group tables there, so
+    group and rank wont line up with get_standings for those.
+    """
+    rows = team_matches(fixtures)
+    if rows.empty:
+        # Preseason / only NS fixtures, same columns with no rows so as_of lookups still work
+        text = ("as_of", "team_name", "team_logo", "group", "form")
+        return pd.DataFrame({c: pd.Series(dtype=object if c in text else np.int64) for c in STANDINGS_COLUMNS})
+    totals = _split_counts(rows)
+    table = rows[["league_id", "league_name", "season", "team_id", "team_name", "team_logo", "as_of"]].copy()
+    for part in ("home", "away"):
+        for name in ("played", "win", "draw", "lose"):
+            table[f"{part}_{name}"] = totals[f"{name}_{part}"]
+    for name in ("played", "win", "draw", "lose", "goals_for", "goals_against"):
+        table[name] = totals[f"{name}_total"]
+    table["points"] = 3 * table["win"] + table["draw"]
+    table["goalsDiff"] = table["goals_for"] - table["goals_against"]
+    table["form"] = [f[::-1][:5] for f in _form(rows)]  # standings show the last 5, newest first
+
+    counts = [c for c in table.columns if c not in ("league_id", "league_name", "season", "team_id", "team_name",
+                                                     "team_logo", "as_of", "form")]
+    # Every team of a league-season on every day of it, values carried forward from the team's last match
+    season_key = ["league_id", "season"]
+    daily = table.drop_duplicates(TEAM_KEY + ["as_of"], keep="last")
+    teams = daily.drop_duplicates(TEAM_KEY, keep="last")[TEAM_KEY + ["team_name", "team_logo", "league_name"]]
+    days = daily[season_key + ["as_of"]].drop_duplicates()
+    if dates:
+        extra = daily[season_key].drop_duplicates().merge(pd.DataFrame({"as_of": list(dates)}), how="cross")
+        days = pd.concat([days, extra], ignore_index=True).drop_duplicates()
+    grid = teams.merge(days, on=season_key).merge(daily[TEAM_KEY + ["as_of"] + counts + ["form"]],
+                                                  on=TEAM_KEY + ["as_of"], how="left")
+    grid = grid.sort_values(TEAM_KEY + ["as_of"], kind="mergesort").reset_index(drop=True)
+    carried = grid[counts + ["form"]].groupby([grid[k] for k in TEAM_KEY], sort=False).ffill()
+    grid[counts] = carried[counts].fillna(0).astype(np.int64)
+    grid["form"] = carried["form"].fillna("")
+    grid = grid.rename(columns={"league_name": "group"})
+    if dates:
+        grid = grid[grid["as_of"].isin(set(dates))]
+
+    out = grid
+    out = out.sort_values(["league_id", "season", "as_of", "points", "goalsDiff", "goals_for"],
+                          ascending=[True, True, True, False, False, False], kind="mergesort")
+    out["rank"] = out.groupby(["league_id", "season", "as_of"], sort=False).cumcount() + 1
+    return out[STANDINGS_COLUMNS].reset_index(drop=True)
+
+
+def standings_as_of(snapshots, date: str = None):
+    """The table on date (YYYY-MM-DD), or the latest one, from standings_snapshots. Empty if there is none yet."""
+    if snapshots.empty:
+        return snapshots.reset_index(drop=True)
+    day = snapshots["as_of"].max() if date is None else snapshots.loc[snapshots["as_of"] <= date, "as_of"].max()
+    return snapshots[snapshots["as_of"] == day].reset_index(drop=True)
+
+
+def compare_with_api(local, api, keys, columns=None, tolerance: float = 0.051):
+    """
+    Lines up a local frame with the API's version on keys and returns the cells that differ
+    as (keys..., column, local, api). Numbers are compared within tolerance (API averages are rounded strings).
+    """
+    columns = columns or [c for c in local.columns if c in api.columns and c not in keys]
+    merged = local[keys + columns].merge(api[keys + columns], on=keys, how="inner", suffixes=("_local", "_api"))
+    diffs = []
+    for column in columns:
+        ours, theirs = merged[f"{column}_local"], merged[f"{column}_api"]
+        ours_num, theirs_num = pd.to_numeric(ours, errors="coerce"), pd.to_numeric(theirs, errors="coerce")
+        numeric = ours_num.notna() & theirs_num.notna()
+        as_text = lambda s: s.astype(object).where(s.notna(), "").astype(str)
+        different = np.where(numeric, (ours_num - theirs_num).abs() > tolerance, as_text(ours) != as_text(theirs))
+        bad = merged[different]
+        if len(bad):
+            diffs.append(pd.DataFrame({**{k: bad[k] for k in keys}, "column": column,
+                                       "local": bad[f"{column}_local"], "api": bad[f"{column}_api"]}))
+    return pd.concat(diffs, ignore_index=True) if diffs else pd.DataFrame(columns=keys + ["column", "local", "api"])
+
+
+def _recorded_entries(cache_dir):
+    """Standings and teams/statistics entries saved in a ResponseCache folder."""
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if entry.get("endpoint", "").strip("/") in ("standings", "teams/statistics") and entry.get("payload"):
+                yield entry
+
+
+def compare_recorded(fixtures, cache_dir, columns=None):
+    """
+    Checks the local numbers against real API responses recorded in a ResponseCache folder
+    (soccer_data_cache/responses or any copy of one). Every recorded standings / teams/statistics
+    response whose league-season is in fixtures gets compared with the local snapshot for the
+    same day: the date param if the call had one, otherwise the UTC day it was recorded.
+    Returns (diffs, compared), diffs has endpoint/league_id/season/as_of plus the compare_with_api columns.
+    """
+    seasons = set(zip(fixtures["league_id"].astype(int), fixtures["league_season"].astype(int)))
+    team_snaps = None
+    standing_snaps = None
+    diffs = []
+    compared = 0
+    for entry in _recorded_entries(cache_dir):
+        params = entry.get("params") or {}
+        try:
+            league, season = int(params["league"]), int(params["season"])
+        except (KeyError, ValueError):
+            continue
+        if (league, season) not in seasons:
+            continue
+        as_of = params.get("date") or datetime.fromtimestamp(entry.get("stored_at") or 0, timezone.utc).strftime("%Y-%m-%d")
+        response = entry["payload"].get("response")
+        if not response:
+            continue
+
+        if entry["endpoint"].strip("/") == "standings":
+            if standing_snaps is None:
+                standing_snaps = standings_snapshots(fixtures)
+            local = standing_snaps[(standing_snaps["league_id"] == league) & (standing_snaps["season"] == season)]
+            local = standings_as_of(local, as_of)
+            api = flatten(standings_rows(response), STANDINGS_SCHEMA)
+            cols = columns or [c for c in local.columns if c in api.columns and c not in ("team_id", "group")]
+            diff = compare_with_api(local, api, ["team_id"], cols)
+            endpoint = "standings"
+        else:
+            if team_snaps is None:
+                team_snaps = team_stats_snapshots(fixtures)
+            local = team_snaps[(team_snaps["league_id"] == league) & (team_snaps["season"] == season)]
+            local = team_stats_as_of(local, as_of, int(params["team"]))
+            diff = compare_with_api(local, pd.DataFrame([team_stats_row(response)]), ["team_id"], columns)
+            endpoint = "teams/statistics"
+
+        compared += 1
+        if len(diff):
+            diffs.append(diff.assign(endpoint=endpoint, league_id=league, season=season, as_of=as_of))
+    out_columns = ["endpoint", "league_id", "season", "as_of", "team_id", "column", "local", "api"]
+    diffs = pd.concat(diffs, ignore_index=True)[out_columns] if diffs else pd.DataFrame(columns=out_columns)
+    return diffs, compared
@@ -1,7 +1,11 @@
 import os
+import logging
 from dotenv import load_dotenv
 from datatry import ComprehensiveSoccerDataIngestion
 
+# The client logs quota/errors instead of printing, show them here
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
 # Getting the API Key
 load_dotenv()
 api_key = os.getenv("API_key")
@@ -52,6 +56,31 @@ print(f"Form: {stats['form']}")
 print(f"Goals scored: {stats['goals_for_total']}")
 print(f"Yellow cards: {stats['yellow_cards_total']}")
 """
+# Bulk ingestion from a manifest, spread over days on the free plan (run it again tomorrow to continue)
+"""
+from planner import IngestionPlan
+plan = IngestionPlan(ingestion, [{"leagues": [39], "seasons": [2023, 2024], "tables": ["fixtures", "standings", "team_stats"]}])
+print(plan.schedule())
+print(plan.run())
+"""
+
+# Several keys / worker processes sharing one queue and quota book (run this same block in every worker)
+"""
+from coordinator import KeyRouter, QuotaCoordinator, run_worker
+coordinator = QuotaCoordinator()
+coordinator.add_manifest([{"leagues": [39, 140], "seasons": [2022, 2023, 2024], "tables": ["fixtures", "standings", "team_stats"]}])
+worker = ComprehensiveSoccerDataIngestion(api_key=api_key, rate_limiter=KeyRouter(coordinator, [api_key, os.getenv("API_key_2")]))
+print(run_worker(worker, coordinator))
+"""
+
+# Model features for every fixture (only uses matches before kickoff), save the state to only add new results next time
+"""
+from features import FeaturePipeline
+pipeline = FeaturePipeline()
+features = pipeline.update(ingestion.get_fixtures(league=39, season=2024))
+pipeline.save("soccer_data_cache/features")
+"""
+
 import json
 # CHecking head-to-head (Man Yanited vs Liverpool)
 h2h = ingestion.get_h2h(team1_id=40, team2_id=42, season=2024)
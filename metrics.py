@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, wide enough for anything from a cache hit to a 60s rate limit wait
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# What each metric means, also used as the HELP line in the Prometheus output
+DESCRIPTIONS = {
+    "requests_total": "HTTP requests sent to the API (this is the quota burn)",
+    "retries_total": "Requests that were retried",
+    "rate_limited_total": "429 responses",
+    "errors_total": "Requests that failed for good",
+    "bytes_received_total": "Response body bytes (compressed size on the wire)",
+    "cache_hits_total": "Responses served from the on-disk cache",
+    "cache_misses_total": "Cache lookups that had to go to the API",
+    "coalesced_total": "Calls that piggybacked on an identical in-flight request",
+    "network_seconds": "Time waiting on the HTTP round trip",
+    "wait_seconds": "Time spent waiting on the rate limiter or retry sleeps",
+    "json_decode_seconds": "Time spent decoding response JSON",
+    "dataframe_build_seconds": "Time spent flattening payloads into DataFrames",
+    "quota_daily_remaining": "Daily requests left according to the last response headers",
+    "quota_daily_limit": "Daily request limit according to the last response headers",
+    "quota_minute_remaining": "Per-minute requests left according to the last response headers",
+}
+
+
+class Histogram:
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs the way Prometheus wants them, +Inf last."""
+        running = 0
+        out = []
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            out.append((bound, running))
+        out.append((float("inf"), self.count))
+        return out
+
+
+class IngestionMetrics:
+    """
+    Per-endpoint counters, gauges and latency histograms for the ingestion client.
+    Hooks get every update as hook(kind, name, endpoint, value) so they can forward it
+    somewhere else (statsd, a profiler, a test).
+    """
+
+    def __init__(self, prefix: str = "soccerai"):
+        self.prefix = prefix
+        self.counters = {}    # (name, endpoint) -> number
+        self.gauges = {}      # (name, endpoint) -> number
+        self.histograms = {}  # (name, endpoint) -> Histogram
+        self.hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def _notify(self, kind, name, endpoint, value):
+        for hook in list(self.hooks):
+            hook(kind, name, endpoint, value)
+
+    def inc(self, name, endpoint: str = "", value: float = 1):
+        with self._lock:
+            self.counters[(name, endpoint)] = self.counters.get((name, endpoint), 0) + value
+        self._notify("counter", name, endpoint, value)
+
+    def set_gauge(self, name, value, endpoint: str = ""):
+        with self._lock:
+            self.gauges[(name, endpoint)] = value
+        self._notify("gauge", name, endpoint, value)
+
+    def observe(self, name, endpoint, seconds):
+        with self._lock:
+            histogram = self.histograms.get((name, endpoint))
+            if histogram is None:
+                histogram = self.histograms[(name, endpoint)] = Histogram()
+            histogram.observe(seconds)
+        self._notify("histogram", name, endpoint, seconds)
+
+    @contextmanager
+    def timer(self, name, endpoint: str = ""):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, endpoint, time.perf_counter() - started)
+
+    def counter(self, name, endpoint: str = None):
+        """Counter value for one endpoint, or summed over all endpoints when endpoint is None."""
+        with self._lock:
+            if endpoint is not None:
+                return self.counters.get((name, endpoint), 0)
+            return sum(v for (n, _), v in self.counters.items() if n == name)
+
+    def cache_hit_rate(self, endpoint: str = None):
+        hits = self.counter("cache_hits_total", endpoint)
+        misses = self.counter("cache_misses_total", endpoint)
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def snapshot(self):
+        """Everything as plain dicts, grouped by endpoint."""
+        with self._lock:
+            endpoints = {}
+            for (name, endpoint), value in self.counters.items():
+                endpoints.setdefault(endpoint or "_all", {})[name] = value
+            for (name, endpoint), value in self.gauges.items():
+                endpoints.setdefault(endpoint or "_all", {})[name] = value
+            for (name, endpoint), histogram in self.histograms.items():
+                endpoints.setdefault(endpoint or "_all", {})[name] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "avg": histogram.sum / histogram.count if histogram.count else 0.0,
+                }
+        for endpoint, values in endpoints.items():
+            hits = values.get("cache_hits_total", 0)
+            misses = values.get("cache_misses_total", 0)
+            if hits or misses:
+                values["cache_hit_rate"] = hits / (hits + misses)
+        return endpoints
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format."""
+        lines = []
+
+        def labels(endpoint, extra=""):
+            parts = [f'endpoint="{endpoint}"'] if endpoint else []
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted((k, (h.cumulative(), h.sum, h.count)) for k, h in self.histograms.items())
+
+        seen = set()
+        for kind, items in (("counter", counters), ("gauge", gauges)):
+            for (name, endpoint), value in items:
+                metric = f"{self.prefix}_{name}"
+                if metric not in seen:
+                    seen.add(metric)
+                    lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+                    lines.append(f"# TYPE {metric} {kind}")
+                lines.append(f"{metric}{labels(endpoint)} {value}")
+
+        for (name, endpoint), (buckets, total, count) in histograms:
+            metric = f"{self.prefix}_{name}"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+            for bound, running in buckets:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = labels(endpoint, 'le="' + le + '"')
+                lines.append(f"{metric}_bucket{bucket_labels} {running}")
+            lines.append(f"{metric}_sum{labels(endpoint)} {total}")
+            lines.append(f"{metric}_count{labels(endpoint)} {count}")
+        return "\n".join(lines) + "\n"
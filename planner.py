@@ -0,0 +1,377 @@
+import json
+import logging
+import os
+
+import pandas as pd
+
+from cache import FINISHED_STATUSES, atomic_write_json
+from rate_limit import quota_day
+from schemas import (FIXTURE_SCHEMA, PLAYER_SCHEMA, STANDINGS_SCHEMA, flatten, player_rows, standings_rows,
+                     team_stats_row)
+
+logger = logging.getLogger(__name__)
+
+# Tables a manifest can ask for, in the order they run for a league-season
+# (fixtures first since team stats need the team ids out of them)
+TABLE_ORDER = ("fixtures", "standings", "team_stats", "players")
+ENDPOINTS = {"fixtures": "fixtures", "standings": "standings", "team_stats": "teams/statistics", "players": "players"}
+
+# Guesses for calls we cant count yet: team stats before the fixtures are in (one call per team),
+# players before page 1 says how many pages there are (~20 teams x 30 players / 20 per page)
+ESTIMATED_CALLS = {"fixtures": 1, "standings": 1, "team_stats": 20, "players": 30}
+
+FREE_PLAN_DAILY_LIMIT = 100
+
+
+def load_manifest(manifest):
+    """
+    A manifest is a list of entries like
+      {"leagues": [39, 140], "seasons": [2023, 2024], "tables": ["fixtures", "standings"], "priority": 0}
+    Accepts that list, a single entry or a path to a JSON file with either. Lower priority runs first.
+    """
+    if isinstance(manifest, str):
+        with open(manifest, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    if isinstance(manifest, dict):
+        manifest = [manifest]
+
+    entries = []
+    for entry in manifest:
+        leagues = entry.get("leagues", entry.get("league"))
+        seasons = entry.get("seasons", entry.get("season"))
+        tables = entry.get("tables") or list(TABLE_ORDER)
+        unknown = [t for t in tables if t not in TABLE_ORDER]
+        if unknown:
+            raise ValueError(f"Unknown tables {unknown} in manifest, expected some of {TABLE_ORDER}")
+        entries.append({
+            "leagues": [int(x) for x in (leagues if isinstance(leagues, list) else [leagues])],
+            "seasons": [int(x) for x in (seasons if isinstance(seasons, list) else [seasons])],
+            "tables": [t for t in TABLE_ORDER if t in tables],
+            "priority": entry.get("priority", 0),
+        })
+    return entries
+
+
+def expand_manifest(entries):
+    """
+    (league, season, table, priority) for every unit a loaded manifest asks for, in run order.
+    Team stats need the team ids out of the fixtures, so fixtures get added in front when missing.
+    """
+    for entry in entries:
+        for league in entry["leagues"]:
+            for season in entry["seasons"]:
+                tables = list(entry["tables"])
+                if "team_stats" in tables and "fixtures" not in tables:
+                    tables.insert(0, "fixtures")  # 1 call, and it is where the team ids come from
+                for table in tables:
+                    yield league, season, table, entry["priority"]
+
+
+class IngestionPlan:
+    """
+    Turns a manifest into the smallest list of API calls that fills it and works through them
+    within the daily quota, one run per day. Progress is saved after every call so a run that
+    stops (budget used up, quota SystemExit, crash) continues from the exact call next time.
+
+    Cheapest endpoint per table: one fixtures?league&season call for the whole season (no per-team calls),
+    one standings call, one teams/statistics call per team (ids come from the stored fixtures) and
+    players paged per league rather than per team. Anything already in the fixture store or the
+    lake (for finished seasons) is left out. Calls still in the response cache stay in the plan,
+    they go through api_call for free so the payload still gets stored.
+    """
+
+    def __init__(self, client, manifest, daily_budget: int = FREE_PLAN_DAILY_LIMIT, reserve: int = 2,
+                 name: str = "plan", state_dir: str = None):
+        self.client = client
+        self.manifest = load_manifest(manifest)
+        self.daily_budget = daily_budget
+        self.reserve = reserve  # left unused each day, same margin as the quota check in api_call
+        self.path = os.path.join(state_dir or os.path.join(client.cache_dir, "plans"), f"{name}.json")
+
+        self.units = {}
+        self.day = None
+        self.used_today = 0
+        self.requests = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.units = state.get("units", {})
+            self.day = state.get("day")
+            self.used_today = state.get("used_today", 0)
+            self.requests = state.get("requests", 0)
+        except (OSError, ValueError):
+            pass
+        self.refresh()
+
+    def save(self):
+        atomic_write_json(self.path, {
+            "units": self.units,
+            "day": self.day,
+            "used_today": self.used_today,
+            "requests": self.requests,
+        })
+
+    # Planning
+
+    def refresh(self):
+        """Adds units for anything new in the manifest. Units already in the saved state keep their progress."""
+        seq = 0
+        wanted = {}
+        for league, season, table, priority in expand_manifest(self.manifest):
+            key = f"{table}:{league}:{season}"
+            if key in wanted:
+                wanted[key]["priority"] = min(wanted[key]["priority"], priority)
+                continue
+            wanted[key] = {"table": table, "league": league, "season": season, "priority": priority, "seq": seq}
+            seq += 1
+
+        # A fixtures unit never runs after the team stats that depend on it
+        for key, unit in wanted.items():
+            if unit["table"] == "team_stats":
+                fixtures = wanted[f"fixtures:{unit['league']}:{unit['season']}"]
+                fixtures["priority"] = min(fixtures["priority"], unit["priority"])
+
+        for key, unit in wanted.items():
+            saved = self.units.get(key)
+            if saved is None:
+                unit.update({"calls": None, "total_pages": None, "done": False, "requests": 0})
+                self.units[key] = unit
+            else:
+                saved["priority"], saved["seq"] = unit["priority"], unit["seq"]
+                if saved["table"] == "fixtures" and saved["done"] and not self._stored_fixtures(saved):
+                    # Season came back empty last time (not published yet), the team stats need it so try again
+                    saved.update({"calls": None, "done": False})
+        for unit in self.open_units():
+            if unit["calls"] is None:
+                unit["calls"] = self._expand(unit)
+        self.save()
+
+    def open_units(self):
+        units = [u for u in self.units.values() if not u["done"]]
+        return sorted(units, key=lambda u: (u["priority"], u["seq"]))
+
+    def _season_finished(self, league, season):
+        items = self.client.fixture_store.fixtures(("league", league, season))
+        return bool(items) and all((it.get("fixture") or {}).get("status", {}).get("short") in FINISHED_STATUSES
+                                   for it in items)
+
+    def _stored_fixtures(self, unit):
+        return bool(self.client.fixture_store.fixtures(("league", unit["league"], unit["season"])))
+
+    def _in_lake(self, table, league, season):
+        lake = self.client.lake
+        if lake is None:
+            return False
+        return bool(lake.partitions(table, [("league_id", "=", league), ("season", "=", season)]))
+
+    def _lake_teams(self, league, season):
+        """Team ids that already have a team_stats row in the lake for this league-season."""
+        if not self._in_lake("team_stats", league, season):
+            return set()
+        df = self.client.lake.read("team_stats", columns=["team_id"],
+                                   filters=[("league_id", "=", league), ("season", "=", season)])
+        return set(df["team_id"].dropna().astype(int))
+
+    def _cached_only(self, endpoint, calls):
+        """
+        Without a lake the response cache is the only place standings/team stats/players end up, so
+        whatever is cached there is done. With a lake the cached calls still have to go through
+        api_call (free, served from the cache) so _store can write them.
+        """
+        if self.client.lake is not None:
+            return calls
+        return [params for params in calls if not self.client.cache.has(endpoint, params)]
+
+    def _expand(self, unit):
+        """
+        The calls a unit still needs, leaving out whatever is stored already. Returns None when
+        that cant be worked out yet (team stats before the fixtures are in).
+        """
+        table, league, season = unit["table"], unit["league"], unit["season"]
+        cache = self.client.cache
+        endpoint = ENDPOINTS[table]
+
+        if table == "fixtures":
+            scope = ("league", league, season)
+            if self.client.fixture_store.has(scope) and self._stored_fixtures(unit):
+                return []
+            return [{"league": league, "season": season}]
+
+        if table == "standings":
+            if self._in_lake("standings", league, season) and self._season_finished(league, season):
+                return []
+            return self._cached_only(endpoint, [{"league": league, "season": season}])
+
+        if table == "team_stats":
+            items = self.client.fixture_store.fixtures(("league", league, season))
+            if not items:
+                return None
+            teams = sorted({(it.get("teams") or {}).get(side, {}).get("id")
+                            for it in items for side in ("home", "away")} - {None})
+            if self._season_finished(league, season):
+                # Finished season stats dont change, teams already in the lake are done
+                stored = self._lake_teams(league, season)
+                teams = [team for team in teams if team not in stored]
+            return self._cached_only(endpoint, [{"league": league, "season": season, "team": team} for team in teams])
+
+        # players: page 1 says how many pages there are
+        if self._in_lake("players", league, season) and self._season_finished(league, season):
+            return []
+        first = {"league": league, "season": season, "page": 1}
+        payload = cache.get(endpoint, first) if cache.has(endpoint, first) else None
+        if payload is None:
+            return [first]
+        unit["total_pages"] = (payload.get("paging") or {}).get("total") or 1
+        pages = [{"league": league, "season": season, "page": page} for page in range(1, unit["total_pages"] + 1)]
+        return self._cached_only(endpoint, pages)
+
+    def _costs_quota(self, unit, params):
+        mode = self.client.cache_mode
+        if mode == "cache-only":
+            return False
+        return mode != "normal" or not self.client.cache.has(ENDPOINTS[unit["table"]], params)
+
+    def estimate(self, unit):
+        """Quota calls a unit still needs (cached ones are free), with a guess for the parts that arent known yet."""
+        if unit["calls"] is None:
+            return ESTIMATED_CALLS[unit["table"]]
+        calls = sum(1 for params in unit["calls"] if self._costs_quota(unit, params))
+        if unit["table"] == "players" and unit["total_pages"] is None:
+            return calls + ESTIMATED_CALLS["players"] - 1
+        return calls
+
+    def _roll_day(self):
+        today = quota_day()
+        if self.day != today:
+            self.day = today
+            self.used_today = 0
+
+    def budget_left(self):
+        """Requests this plan may still spend today."""
+        self._roll_day()
+        left = self.daily_budget - self.reserve - self.used_today
+        remaining = self.client.rate_limiter.daily_remaining
+        if remaining is not None:
+            left = min(left, remaining - self.reserve)
+        return max(0, left)
+
+    def schedule(self):
+        """
+        Which day each open unit should run on if every day gets the full budget (day 0 is today).
+        Returns dicts with table/league/season, the estimated calls and first/last day.
+        """
+        per_day = max(1, self.daily_budget - self.reserve)
+        day, room = 0, self.budget_left()
+        plan = []
+        for unit in self.open_units():
+            cost = self.estimate(unit)
+            while room == 0 and cost:
+                day, room = day + 1, per_day
+            first_day = day
+            left = cost
+            while left > room:
+                left -= room
+                day, room = day + 1, per_day
+            room -= left
+            plan.append({"table": unit["table"], "league": unit["league"], "season": unit["season"],
+                         "calls": cost, "first_day": first_day, "last_day": day})
+        return plan
+
+    # Running
+
+    def _store(self, unit, params, data):
+        table, league, season = unit["table"], unit["league"], unit["season"]
+        lake = self.client.lake
+        items = data.get("response")
+        if table == "fixtures":
+            self.client.fixture_store.put(("league", league, season), items)
+            if lake is not None and items:
+                lake.upsert("fixtures", flatten(items, FIXTURE_SCHEMA))
+        elif table == "standings":
+            if lake is not None:
+                lake.upsert("standings", flatten(standings_rows(items), STANDINGS_SCHEMA), league_id=league, season=season)
+        elif table == "team_stats":
+            if lake is not None and items:
+                lake.upsert("team_stats", pd.DataFrame([team_stats_row(items)]), as_of=None)
+        else:
+            if lake is not None and items:
+                lake.upsert("players", flatten(player_rows(items), PLAYER_SCHEMA))
+            if params.get("page") == 1 and unit["total_pages"] is None:
+                # The rest of the pages are known now
+                unit["total_pages"] = (data.get("paging") or {}).get("total") or 1
+                unit["calls"] += [{"league": league, "season": season, "page": page}
+                                  for page in range(2, unit["total_pages"] + 1)]
+
+    def run(self, max_requests: int = None, on_call=None):
+        """
+        Works through the plan until it is done, todays budget is spent or max_requests went out.
+        Calls answered from the cache dont count. Returns a summary dict, "stopped" says why it ended.
+        on_call(params) runs before every call, returning False stops the run (stopped "lease",
+        the coordinator uses it to renew its lease and to back off when someone else took it).
+        """
+        made = 0
+        stopped = None
+        metrics = self.client.metrics
+        try:
+            for unit in self.open_units():
+                if unit["calls"] is None:
+                    unit["calls"] = self._expand(unit)
+                    self.save()
+                if unit["calls"] is None:
+                    logger.warning("Skipping %s %s/%s, no fixtures stored to get team ids from",
+                                   unit["table"], unit["league"], unit["season"])
+                    continue
+
+                while unit["calls"]:
+                    params = unit["calls"][0]
+                    out_of_budget = self.budget_left() <= 0 or (max_requests is not None and made >= max_requests)
+                    if out_of_budget and self._costs_quota(unit, params):
+                        stopped = "budget"
+                        return self.summary(made, stopped)
+                    if on_call is not None and on_call(params) is False:
+                        stopped = "lease"
+                        return self.summary(made, stopped)
+                    before = metrics.counter("requests_total")
+                    try:
+                        data = self.client.api_call(ENDPOINTS[unit["table"]], params)
+                    finally:
+                        spent = metrics.counter("requests_total") - before
+                        made += spent
+                        self.used_today += spent
+                        self.requests += spent
+                        unit["requests"] += spent
+                        self.save()
+
+                    if data.get("response") is None or data.get("errors"):
+                        logger.warning("Plan call %s %s failed, will retry on the next run", unit["table"], params)
+                        break
+                    self._store(unit, params, data)
+                    unit["calls"].pop(0)
+                    self.save()
+
+                if not unit["calls"]:
+                    unit["done"] = True
+                    self.save()
+        except SystemExit:
+            # api_call's daily quota guard, the response was cached before it fired so nothing is lost
+            stopped = "quota"
+            logger.warning("Daily quota reached, plan saved to %s", self.path)
+        return self.summary(made, stopped)
+
+    def summary(self, made: int = 0, stopped: str = None):
+        open_units = self.open_units()
+        left = sum(self.estimate(u) for u in open_units)
+        per_day = max(1, self.daily_budget - self.reserve)
+        if stopped is None and open_units:
+            stopped = "failed"
+        summary = {
+            "requests": made,
+            "units_done": sum(1 for u in self.units.values() if u["done"]),
+            "units_open": len(open_units),
+            "calls_left": left,
+            "days_left": -(-left // per_day),
+            "stopped": stopped or "done",
+        }
+        logger.info("Plan %s: %d requests this run, %d/%d units done, ~%d calls (%d days) left",
+                    os.path.basename(self.path), made, summary["units_done"], len(self.units), left, summary["days_left"])
+        return summary
@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+def header_int(value):
+    """Rate limit header value as an int, None if it is missing or garbage."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def quota_day():
+    """The day the daily quota counts against, it resets on the UTC day."""
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+
+def parse_retry_after(value):
+    """Retry-After can be seconds or an HTTP date, returns seconds to wait (or None)."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None, base_backoff: float = 1.0, max_backoff: float = 60.0):
+    """
+    How long to pause after a 429: Retry-After if the server sent one, otherwise a jittered
+    exponential delay. Jitter either way so workers dont retry in lockstep.
+    """
+    delay = parse_retry_after(retry_after)
+    if delay is None:
+        delay = min(max_backoff, base_backoff * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+    return delay + random.uniform(0, min(1.0, delay * 0.1))
+
+
+class RateLimiter:
+    """
+    Token bucket that paces requests against the per-minute budget.
+    Starts from requests_per_minute and then follows whatever the API headers say:
+      x-ratelimit-limit / x-ratelimit-remaining                    -> per minute
+      x-ratelimit-requests-limit / x-ratelimit-requests-remaining  -> per day
+    Thread safe, so one instance can be shared between clients using the same key.
+    """
+
+    def __init__(self, requests_per_minute: float = 10.0, base_backoff: float = 1.0, max_backoff: float = 60.0):
+        # 0 or less (or inf) means no per-minute cap until the headers give us one
+        if requests_per_minute is None or requests_per_minute <= 0:
+            requests_per_minute = float("inf")
+        # Room for at least one request, else a pace slower than 1/min could never fill a whole token
+        self.capacity = max(1.0, float(requests_per_minute))
+        self.tokens = self.capacity
+        self.refill_rate = float(requests_per_minute) / 60.0  # tokens per second
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.minute_limit = None
+        self.minute_remaining = None
+        self.daily_limit = None
+        self.daily_remaining = None
+
+        self.total_wait = 0.0  # seconds spent waiting on the limiter, handy for tuning
+        self._blocked_until = 0.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        if self.refill_rate == float("inf"):
+            self.tokens = self.capacity  # no cap, dont multiply 0 elapsed by inf
+            self._last_refill = now
+        elif elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self._last_refill = now
+
+    def acquire(self):
+        """Blocks only if the next request would go over budget. Returns how long it waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = max(0.0, self._blocked_until - now)
+                if wait == 0.0:
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        self.total_wait += waited
+                        return waited
+                    wait = (1.0 - self.tokens) / self.refill_rate
+            time.sleep(wait)
+            waited += wait
+
+    def update_from_headers(self, headers):
+        """Syncs the bucket with what the server says is left."""
+        minute_limit = header_int(headers.get("x-ratelimit-limit"))
+        minute_remaining = header_int(headers.get("x-ratelimit-remaining"))
+        daily_limit = header_int(headers.get("x-ratelimit-requests-limit"))
+        daily_remaining = header_int(headers.get("x-ratelimit-requests-remaining"))
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if minute_limit:
+                self.minute_limit = minute_limit
+                if minute_limit != self.capacity:
+                    self.capacity = float(minute_limit)
+                    self.refill_rate = self.capacity / 60.0
+            if minute_remaining is not None:
+                self.minute_remaining = minute_remaining
+                # Server knows about requests we dont (other processes etc), trust the lower number
+                self.tokens = min(self.tokens, float(minute_remaining))
+            if daily_limit is not None:
+                self.daily_limit = daily_limit
+            if daily_remaining is not None:
+                self.daily_remaining = daily_remaining
+
+    def request_headers(self):
+        """Extra headers for the request that just got through acquire(), none here (the session has the key)."""
+        return {}
+
+    def quota_exhausted(self):
+        """True once the daily quota is down to the last request or so."""
+        return self.daily_remaining is not None and self.daily_remaining < 2
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Called after a 429. Everyone sharing this limiter pauses for Retry-After if the
+        server sent one, otherwise for a jittered exponential delay. Returns the delay.
+        """
+        delay = backoff_delay(attempt, retry_after, self.base_backoff, self.max_backoff)
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + delay)
+            self.tokens = 0.0
+            self._last_refill = now
+        return delay
+
+
+_shared_limiters = {}
+_shared_lock = threading.Lock()
+
+
+def shared_limiter(api_key, requests_per_minute: float = 10.0):
+    """One limiter per API key per process, so several clients dont blow the same budget."""
+    with _shared_lock:
+        limiter = _shared_limiters.get(api_key)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_minute=requests_per_minute)
+            _shared_limiters[api_key] = limiter
+        return limiter
@@ -0,0 +1,331 @@
+import numpy as np
+import pandas as pd
+
+# One declarative schema per endpoint: (dotted path in the API item, column name, dtype).
+# dtype None means leave the values as they came (strings, mixed stuff, etc).
+# Float64 parses numeric strings, e.g. player ratings.
+
+FIXTURE_SCHEMA = [
+    ("fixture.id", "fixture_id", "Int64"),
+    ("fixture.referee", "referee", None),
+    ("fixture.timezone", "timezone", None),
+    ("fixture.date", "date", None),
+    ("fixture.timestamp", "timestamp", "Int64"),
+    ("fixture.venue.id", "venue_id", "Int64"),
+    ("fixture.venue.name", "venue_name", None),
+    ("fixture.venue.city", "venue_city", None),
+    ("fixture.status.long", "status_long", None),
+    ("fixture.status.short", "status_short", None),
+    ("fixture.status.elapsed", "status_elapsed", "Int64"),
+    ("league.id", "league_id", "Int64"),
+    ("league.name", "league_name", None),
+    ("league.country", "league_country", None),
+    ("league.season", "league_season", "Int64"),
+    ("league.round", "league_round", None),
+    ("teams.home.id", "home_team_id", "Int64"),
+    ("teams.home.name", "home_team_name", None),
+    ("teams.home.logo", "home_team_logo", None),
+    ("teams.home.winner", "home_team_winner", "boolean"),
+    ("teams.away.id", "away_team_id", "Int64"),
+    ("teams.away.name", "away_team_name", None),
+    ("teams.away.logo", "away_team_logo", None),
+    ("teams.away.winner", "away_team_winner", "boolean"),
+    ("goals.home", "home_goals", "Int64"),
+    ("goals.away", "away_goals", "Int64"),
+    ("score.halftime.home", "halftime_home", "Int64"),
+    ("score.halftime.away", "halftime_away", "Int64"),
+    ("score.fulltime.home", "fulltime_home", "Int64"),
+    ("score.fulltime.away", "fulltime_away", "Int64"),
+    ("score.extratime.home", "extratime_home", "Int64"),
+    ("score.extratime.away", "extratime_away", "Int64"),
+    ("score.penalty.home", "penalty_home", "Int64"),
+    ("score.penalty.away", "penalty_away", "Int64"),
+]
+
+H2H_SCHEMA = [
+    ("fixture.id", "fixture_id", "Int64"),
+    ("fixture.referee", "referee", None),
+    ("fixture.date", "date", None),
+    ("fixture.timestamp", "timestamp", "Int64"),
+    ("fixture.venue.name", "venue_name", None),
+    ("fixture.venue.city", "venue_city", None),
+    ("fixture.status.long", "status", None),
+    ("league.name", "league_name", None),
+    ("league.round", "league_round", None),
+    ("teams.home.id", "home_team_id", "Int64"),
+    ("teams.home.name", "home_team_name", None),
+    ("teams.home.winner", "home_team_winner", "boolean"),
+    ("teams.away.id", "away_team_id", "Int64"),
+    ("teams.away.name", "away_team_name", None),
+    ("teams.away.winner", "away_team_winner", "boolean"),
+    ("goals.home", "home_goals", "Int64"),
+    ("goals.away", "away_goals", "Int64"),
+]
+
+# Rows here are the team entries inside league.standings[group][...]
+STANDINGS_SCHEMA = [
+    ("rank", "rank", "Int64"),
+    ("team.id", "team_id", "Int64"),
+    ("team.name", "team_name", None),
+    ("team.logo", "team_logo", None),
+    ("points", "points", "Int64"),
+    ("goalsDiff", "goalsDiff", "Int64"),
+    ("group", "group", None),
+    ("form", "form", None),
+    ("status", "status", None),
+    ("description", "description", None),
+    ("all.played", "played", "Int64"),
+    ("all.win", "win", "Int64"),
+    ("all.draw", "draw", "Int64"),
+    ("all.lose", "lose", "Int64"),
+    ("all.goals.for", "goals_for", "Int64"),
+    ("all.goals.against", "goals_against", "Int64"),
+    ("home.played", "home_played", "Int64"),
+    ("home.win", "home_win", "Int64"),
+    ("home.draw", "home_draw", "Int64"),
+    ("home.lose", "home_lose", "Int64"),
+    ("away.played", "away_played", "Int64"),
+    ("away.win", "away_win", "Int64"),
+    ("away.draw", "away_draw", "Int64"),
+    ("away.lose", "away_lose", "Int64"),
+]
+
+# Rows here are one per (player, statistics entry), see player_rows. A player who moved
+# mid-season (or played several competitions) gets a row per team/competition.
+PLAYER_SCHEMA = [
+    ("player.id", "player_id", "Int64"),
+    ("player.name", "player_name", None),
+    ("player.firstname", "firstname", None),
+    ("player.lastname", "lastname", None),
+    ("player.age", "age", "Int64"),
+    ("player.nationality", "nationality", None),
+    ("player.height", "height", None),
+    ("player.weight", "weight", None),
+    ("player.injured", "injured", "boolean"),
+    ("team.id", "team_id", "Int64"),
+    ("team.name", "team_name", None),
+    ("league.id", "league_id", "Int64"),
+    ("league.name", "league_name", None),
+    ("league.season", "season", "Int64"),
+    ("games.appearences", "appearances", "Int64"),  # sic, thats how the API spells it
+    ("games.lineups", "lineups", "Int64"),
+    ("games.minutes", "minutes", "Int64"),
+    ("games.position", "position", None),
+    ("games.rating", "rating", "Float64"),
+    ("games.captain", "captain", "boolean"),
+    ("substitutes.in", "subbed_in", "Int64"),
+    ("substitutes.out", "subbed_out", "Int64"),
+    ("substitutes.bench", "bench", "Int64"),
+    ("shots.total", "shots_total", "Int64"),
+    ("shots.on", "shots_on", "Int64"),
+    ("goals.total", "goals_total", "Int64"),
+    ("goals.conceded", "goals_conceded", "Int64"),
+    ("goals.assists", "assists", "Int64"),
+    ("goals.saves", "saves", "Int64"),
+    ("passes.total", "passes_total", "Int64"),
+    ("passes.key", "passes_key", "Int64"),
+    ("passes.accuracy", "passes_accuracy", "Int64"),
+    ("tackles.total", "tackles_total", "Int64"),
+    ("tackles.blocks", "blocks", "Int64"),
+    ("tackles.interceptions", "interceptions", "Int64"),
+    ("duels.total", "duels_total", "Int64"),
+    ("duels.won", "duels_won", "Int64"),
+    ("dribbles.attempts", "dribbles_attempts", "Int64"),
+    ("dribbles.success", "dribbles_success", "Int64"),
+    ("fouls.drawn", "fouls_drawn", "Int64"),
+    ("fouls.committed", "fouls_committed", "Int64"),
+    ("cards.yellow", "yellow_cards", "Int64"),
+    ("cards.yellowred", "yellowred_cards", "Int64"),
+    ("cards.red", "red_cards", "Int64"),
+    ("penalty.won", "penalty_won", "Int64"),
+    ("penalty.commited", "penalty_committed", "Int64"),
+    ("penalty.scored", "penalty_scored", "Int64"),
+    ("penalty.missed", "penalty_missed", "Int64"),
+    ("penalty.saved", "penalty_saved", "Int64"),
+]
+
+LEAGUE_SCHEMA = [
+    ("league.id", "league_id", "Int64"),
+    ("league.name", "name", None),
+    ("league.team", "team", None),
+    ("league.type", "type", None),
+]
+
+TEAM_STATS_SCHEMA = [
+    ("team.id", "team_id", "Int64"),
+    ("team.name", "team_name", None),
+    ("team.logo", "team_logo", None),
+    ("league.id", "league_id", "Int64"),
+    ("league.name", "league_name", None),
+    ("league.season", "season", "Int64"),
+    ("form", "form", None),
+
+    # Fixtures
+    ("fixtures.played.home", "fixtures_played_home", "Int64"),
+    ("fixtures.played.away", "fixtures_played_away", "Int64"),
+    ("fixtures.played.total", "fixtures_played_total", "Int64"),
+    ("fixtures.wins.home", "fixtures_wins_home", "Int64"),
+    ("fixtures.wins.away", "fixtures_wins_away", "Int64"),
+    ("fixtures.wins.total", "fixtures_wins_total", "Int64"),
+    ("fixtures.draws.home", "fixtures_draws_home", "Int64"),
+    ("fixtures.draws.away", "fixtures_draws_away", "Int64"),
+    ("fixtures.draws.total", "fixtures_draws_total", "Int64"),
+    ("fixtures.loses.home", "fixtures_loses_home", "Int64"),
+    ("fixtures.loses.away", "fixtures_loses_away", "Int64"),
+    ("fixtures.loses.total", "fixtures_loses_total", "Int64"),
+
+    # Goals
+    ("goals.for.total.home", "goals_for_total_home", "Int64"),
+    ("goals.for.total.away", "goals_for_total_away", "Int64"),
+    ("goals.for.total.total", "goals_for_total", "Int64"),
+    ("goals.for.average.home", "goals_for_avg_home", None),
+    ("goals.for.average.away", "goals_for_avg_away", None),
+    ("goals.for.average.total", "goals_for_avg_total", None),
+    ("goals.against.total.home", "goals_against_total_home", "Int64"),
+    ("goals.against.total.away", "goals_against_total_away", "Int64"),
+    ("goals.against.total.total", "goals_against_total", "Int64"),
+    ("goals.against.average.home", "goals_against_avg_home", None),
+    ("goals.against.average.away", "goals_against_avg_away", None),
+    ("goals.against.average.total", "goals_against_avg_total", None),
+
+    # "Biggest Stats lol"
+    ("biggest.streak.wins", "biggest_streak_wins", "Int64"),
+    ("biggest.streak.draws", "biggest_streak_draws", "Int64"),
+    ("biggest.streak.loses", "biggest_streak_loses", "Int64"),
+    ("biggest.wins.home", "biggest_wins_home", None),
+    ("biggest.wins.away", "biggest_wins_away", None),
+    ("biggest.loses.home", "biggest_loses_home", None),
+    ("biggest.loses.away", "biggest_loses_away", None),
+
+    # Clean sheets
+    ("clean_sheet.home", "clean_sheet_home", "Int64"),
+    ("clean_sheet.away", "clean_sheet_away", "Int64"),
+    ("clean_sheet.total", "clean_sheet_total", "Int64"),
+
+    # Failed to score, very interesting stat imo
+    ("failed_to_score.home", "failed_to_score_home", "Int64"),
+    ("failed_to_score.away", "failed_to_score_away", "Int64"),
+    ("failed_to_score.total", "failed_to_score_total", "Int64"),
+
+    # Penalty
+    ("penalty.scored.total", "penalty_scored_total", "Int64"),
+    ("penalty.scored.percentage", "penalty_scored_percentage", None),
+    ("penalty.missed.total", "penalty_missed_total", "Int64"),
+    ("penalty.missed.percentage", "penalty_missed_percentage", None),
+]
+
+CARD_INTERVALS = ["0-15", "16-30", "31-45", "46-60", "61-75", "76-90", "91-105", "106-120"]
+
+
+def _extract_columns(items, schema):
+    """
+    Pulls every schema path out of items as plain lists, one list per column.
+    Shared prefixes are only walked once, e.g. "fixture" is looked up once per item
+    for all eleven fixture.* columns instead of eleven times.
+    """
+    levels = {(): items}
+
+    def level(prefix):
+        found = levels.get(prefix)
+        if found is None:
+            parent = level(prefix[:-1])
+            key = prefix[-1]
+            found = [(p.get(key) if p is not None else None) for p in parent]
+            levels[prefix] = found
+        return found
+
+    columns = {}
+    for path, column, _ in schema:
+        parts = tuple(path.split("."))
+        parent = level(parts[:-1])
+        key = parts[-1]
+        columns[column] = [(p.get(key) if p is not None else None) for p in parent]
+    return columns
+
+
+def _int_array(values):
+    """Nullable Int64 straight from numpy, a lot quicker than letting pandas infer from a list with Nones."""
+    try:
+        return pd.arrays.IntegerArray(np.array(values, dtype=np.int64), np.zeros(len(values), dtype=bool))
+    except (TypeError, ValueError):
+        pass
+    raw = np.array(values, dtype=object)
+    mask = np.equal(raw, None)
+    out = np.zeros(len(values), dtype=np.int64)
+    if not mask.all():
+        out[~mask] = raw[~mask].astype(np.int64)
+    return pd.arrays.IntegerArray(out, mask)
+
+
+def flatten(items, schema):
+    """Turns a list of API items into a typed DataFrame following schema, built column by column."""
+    columns = _extract_columns(items, schema)
+    data = {}
+    for _, column, dtype in schema:
+        values = columns[column]
+        if dtype is None:
+            data[column] = pd.Series(values, dtype=object)
+        elif dtype == "Int64":
+            data[column] = pd.Series(_int_array(values))
+        elif dtype == "Float64":
+            # Ratings and such come as strings ("7.150000"), anything unparsable becomes <NA>
+            data[column] = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").astype("Float64")
+        else:
+            data[column] = pd.Series(values, dtype=dtype)
+    return pd.DataFrame(data, columns=[column for _, column, _ in schema])
+
+
+def flatten_one(item, schema):
+    """Same paths but for a single object, gives back a plain dict with the raw values."""
+    columns = _extract_columns([item], schema)
+    return {column: values[0] for column, values in columns.items()}
+
+
+def standings_rows(response):
+    """Standings come nested as response -> league -> standings -> group -> team, unnest them."""
+    return [
+        team
+        for resp in response
+        for standing_group in (resp.get("league") or {}).get("standings") or []
+        for team in standing_group
+    ]
+
+
+def player_rows(response):
+    """players items hold a list of statistics (one per team/competition), one row each with the player attached."""
+    return [
+        {"player": item.get("player") or {}, **stat}
+        for item in response
+        for stat in item.get("statistics") or []
+    ]
+
+
+def h2h_winner(df):
+    """Home team name if home won, away name if away won, otherwise Draw."""
+    home_won = df["home_team_winner"].fillna(False).astype(bool)
+    away_won = df["away_team_winner"].fillna(False).astype(bool)
+    winner = pd.Series("Draw", index=df.index, dtype=object)
+    winner[away_won] = df.loc[away_won, "away_team_name"]
+    winner[home_won] = df.loc[home_won, "home_team_name"]
+    return winner
+
+
+def card_total(cards, colour):
+    """Sums a card colour over every time interval."""
+    by_interval = (cards or {}).get(colour) or {}
+    return sum(((by_interval.get(interval) or {}).get("total") or 0) for interval in CARD_INTERVALS)
+
+
+def team_stats_row(response):
+    """One flat dict for a teams/statistics response, plus card totals and the most used formation."""
+    stats = flatten_one(response, TEAM_STATS_SCHEMA)
+
+    # Cards - extract totals from time intervals
+    stats["yellow_cards_total"] = card_total(response.get("cards"), "yellow")
+    stats["red_cards_total"] = card_total(response.get("cards"), "red")
+
+    # Lineups - most used formation
+    lineups = response.get("lineups") or [{}]
+    stats["most_used_formation"] = lineups[0].get("formation")
+    stats["formation_played"] = lineups[0].get("played")
+    return stats
@@ -0,0 +1,285 @@
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cache import cache_key
+import synthetic_data
+
+# Local stand-in for v3.football.api-sports.io so benchmarks dont spend real quota.
+# Serves synthetic payloads (or recorded ones from a ResponseCache folder) and can fake
+# latency, rate limit headers, 429s and timeouts.
+
+
+def _fixture_scope(fixture_id):
+    """Synthetic fixture ids encode their league-season, see synthetic_data.league_season_fixtures."""
+    base = fixture_id // 1000
+    return base // 10000, 2000 + base % 10000
+
+
+class StandInAPI:
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, requests_per_minute: int = None,
+                 daily_limit: int = 1_000_000, rate_429: float = 0.0, timeout_rate: float = 0.0,
+                 timeout_delay: float = 2.0, recorded_dir: str = None, n_teams: int = 20, seed: int = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests_per_minute = requests_per_minute
+        self.daily_limit = daily_limit
+        self.rate_429 = rate_429
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.recorded_dir = recorded_dir
+        self.n_teams = n_teams
+        self.rng = random.Random(seed)
+
+        self.served = 0
+        self.throttled = 0
+        self.timed_out = 0
+        self._minute = None
+        self._minute_count = 0
+        self._day_count = 0
+        self._lock = threading.Lock()
+        self._seasons = {}
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive like the real thing
+
+            def do_GET(self):
+                api._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Payloads
+
+    def season_fixtures(self, league, season):
+        key = (league, season)
+        with self._lock:
+            if key not in self._seasons:
+                self._seasons[key] = synthetic_data.league_season_fixtures(league, season, self.n_teams)
+            return self._seasons[key]
+
+    def _recorded(self, endpoint, params):
+        if not self.recorded_dir:
+            return None
+        key = cache_key(endpoint, params)
+        path = os.path.join(self.recorded_dir, key[:2], f"{key}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("payload")
+        except (OSError, ValueError):
+            return None
+
+    def payload(self, endpoint, params):
+        recorded = self._recorded(endpoint, params)
+        if recorded is not None:
+            return recorded
+
+        def num(name):
+            return int(params[name]) if name in params else None
+
+        if endpoint == "fixtures":
+            return synthetic_data.envelope("fixtures", params, self._fixtures(params))
+        if endpoint == "standings":
+            league, season = num("league"), num("season")
+            return synthetic_data.standings_payload(league, season, self.season_fixtures(league, season))
+        if endpoint == "teams/statistics":
+            league, season = num("league"), num("season")
+            return synthetic_data.team_statistics_payload(league, season, num("team"),
+                                                          self.season_fixtures(league, season), params.get("date"))
+        if endpoint == "players":
+            if "id" in params:
+                player_id = num("id")
+                team = player_id // 100
+                league = team // 1000
+                return synthetic_data.envelope("players", params,
+                                               [synthetic_data.make_player(player_id, team, league, num("season"))])
+            team = num("team")
+            league = num("league") if "league" in params else (team // 1000 if team else 1)
+            return synthetic_data.players_page(league, num("season"), page=num("page") or 1, team_id=team,
+                                               n_teams=self.n_teams)
+        if endpoint == "leagues":
+            return synthetic_data.leagues_payload()
+        if endpoint in ("timezone", "status"):
+            return synthetic_data.envelope(endpoint, params, ["UTC"])
+        return None
+
+    def _fixtures(self, params):
+        if "ids" in params or "id" in params:
+            wanted = [int(i) for i in (params.get("ids") or params.get("id")).split("-")]
+            found = []
+            for fixture_id in wanted:
+                league, season = _fixture_scope(fixture_id)
+                found += [f for f in self.season_fixtures(league, season) if f["fixture"]["id"] == fixture_id]
+            return found
+
+        if "live" in params:
+            leagues = range(1, 4) if params["live"] == "all" else [int(x) for x in params["live"].split("-")]
+            # A handful of matches per league that move on a minute every few seconds
+            minute = int(time.time() / 5) % 90 + 1
+            kickoff = datetime.now(timezone.utc)
+            live = []
+            for league in leagues:
+                for n in range(self.n_teams // 4):
+                    live.append(synthetic_data.make_fixture(
+                        900000000 + league * 100 + n, league, 2024, league * 1000 + 2 * n + 1, league * 1000 + 2 * n + 2,
+                        kickoff, "1H" if minute <= 45 else "2H", minute // 30, minute // 40, elapsed=minute))
+            return live
+
+        season = int(params["season"]) if "season" in params else 2024
+        if "league" in params:
+            items = list(self.season_fixtures(int(params["league"]), season))
+        else:
+            items = [f for league in range(1, 4) for f in self.season_fixtures(league, season)]
+
+        if "team" in params:
+            team = int(params["team"])
+            items = [f for f in items if team in (f["teams"]["home"]["id"], f["teams"]["away"]["id"])]
+        if "date" in params:
+            items = [f for f in items if f["fixture"]["date"][:10] == params["date"]]
+        if "from" in params:
+            items = [f for f in items if f["fixture"]["date"][:10] >= params["from"]]
+        if "to" in params:
+            items = [f for f in items if f["fixture"]["date"][:10] <= params["to"]]
+        if "status" in params:
+            wanted = set(params["status"].split("-"))
+            items = [f for f in items if f["fixture"]["status"]["short"] in wanted]
+        if "round" in params:
+            items = [f for f in items if f["league"]["round"] == params["round"]]
+        if "last" in params:
+            items = [f for f in items if f["fixture"]["status"]["short"] == "FT"][-int(params["last"]):]
+        if "next" in params:
+            items = [f for f in items if f["fixture"]["status"]["short"] == "NS"][:int(params["next"])]
+        return items
+
+    # Request handling
+
+    def _rate_headers(self):
+        """Counts the request and returns (headers, throttled, retry_after)."""
+        with self._lock:
+            minute = int(time.time() // 60)
+            if minute != self._minute:
+                self._minute = minute
+                self._minute_count = 0
+            self._minute_count += 1
+            self._day_count += 1
+            headers = {
+                "x-ratelimit-requests-limit": str(self.daily_limit),
+                "x-ratelimit-requests-remaining": str(max(0, self.daily_limit - self._day_count)),
+            }
+            if self.requests_per_minute:
+                headers["x-ratelimit-limit"] = str(self.requests_per_minute)
+                headers["x-ratelimit-remaining"] = str(max(0, self.requests_per_minute - self._minute_count))
+                if self._minute_count > self.requests_per_minute:
+                    return headers, True, max(1, 60 - int(time.time() % 60))  # wait for the next window
+            if self.rate_429 and self.rng.random() < self.rate_429:
+                return headers, True, 1  # random hiccup, short retry
+            return headers, False, None
+
+    def _send(self, handler, status, body, headers):
+        raw = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        if "gzip" in (handler.headers.get("Accept-Encoding") or ""):
+            raw = gzip.compress(raw, compresslevel=1)
+            headers = {**headers, "Content-Encoding": "gzip"}
+        try:
+            handler.send_response(status)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(raw)))
+            for name, value in headers.items():
+                handler.send_header(name, value)
+            handler.end_headers()
+            handler.wfile.write(raw)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client already gave up (simulated timeout), nothing to do
+
+    def _handle(self, handler):
+        url = urlparse(handler.path)
+        endpoint = url.path.strip("/")
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if endpoint == "_stats":
+            # Not part of the real API, lets the benchmark read counters when the server runs in its own process
+            self._send(handler, 200, {"served": self.served, "throttled": self.throttled, "timed_out": self.timed_out}, {})
+            return
+
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if self.timeout_rate and self.rng.random() < self.timeout_rate:
+            with self._lock:
+                self.timed_out += 1
+            delay += self.timeout_delay
+        if delay:
+            time.sleep(delay)
+
+        headers, throttled, retry_after = self._rate_headers()
+        if throttled:
+            with self._lock:
+                self.throttled += 1
+            self._send(handler, 429, {"message": "Too many requests"}, {**headers, "Retry-After": str(retry_after)})
+            return
+
+        body = self.payload(endpoint, params)
+        if body is None:
+            self._send(handler, 404, {"message": f"Endpoint '{endpoint}' does not exist"}, headers)
+            return
+        with self._lock:
+            self.served += 1
+        self._send(handler, 200, body, headers)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the stand-in API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=None, help="per-minute limit, off by default")
+    parser.add_argument("--daily-limit", type=int, default=1_000_000)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with a random 429")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests delayed by --timeout-delay")
+    parser.add_argument("--timeout-delay", type=float, default=2.0)
+    parser.add_argument("--recorded-dir", default=None, help="ResponseCache folder to serve recorded payloads from")
+    args = parser.parse_args()
+
+    api = StandInAPI(latency=args.latency, jitter=args.jitter, requests_per_minute=args.rpm,
+                     daily_limit=args.daily_limit, rate_429=args.rate_429, timeout_rate=args.timeout_rate,
+                     timeout_delay=args.timeout_delay, recorded_dir=args.recorded_dir, host=args.host, port=args.port)
+    print(f"Stand-in API on {api.url}", flush=True)
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,136 @@
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Table layout for the lake: which columns make a row unique, how files get split up on disk
+# and how rows are ordered inside a file. Fixtures are sorted by kickoff so date filters can
+# skip row groups using the parquet min/max stats instead of needing a folder per day
+# (a folder per day/month meant thousands of tiny files and slow reads).
+TABLES = {
+    "fixtures": {"keys": ["fixture_id"], "partitions": ["league_id", "league_season"], "sort": ["timestamp"]},
+    "standings": {"keys": ["team_id", "group"], "partitions": ["league_id", "season"], "sort": ["rank"]},
+    "team_stats": {"keys": ["team_id", "as_of"], "partitions": ["league_id", "season"], "sort": ["team_id"]},
+    "players": {"keys": ["player_id", "team_id"], "partitions": ["league_id", "season"], "sort": ["team_id", "player_id"]},
+}
+
+_OPS = {
+    "=": lambda a, b: a == b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "not in": lambda a, b: a not in b,
+}
+
+
+def _partition_value(value):
+    """Folder values come back as strings, turn them into ints when they look like ints."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+class DataLake:
+    """
+    Parquet files on disk, one file per partition, e.g.
+      soccer_data_lake/fixtures/league_id=39/league_season=2024/part.parquet
+    Writes are upserts by the table keys so re-ingesting the same data never duplicates rows.
+    """
+
+    def __init__(self, root: str = "soccer_data_lake"):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _prepare(self, table, df, constants):
+        df = df.copy()
+        for column, value in constants.items():
+            df[column] = value
+        if table == "team_stats" and "as_of" not in df.columns:
+            df["as_of"] = None
+        missing = [c for c in TABLES[table]["partitions"] if c not in df.columns]
+        if missing:
+            raise ValueError(f"{table} rows are missing partition columns {missing}")
+        return df
+
+    def _partition_dir(self, table, values):
+        parts = [f"{column}={value}" for column, value in zip(TABLES[table]["partitions"], values)]
+        return os.path.join(self.root, table, *parts)
+
+    def upsert(self, table, df, **constants):
+        """
+        Writes df into its partitions, replacing rows with the same keys. constants get added as
+        columns first, e.g. upsert("standings", df, league_id=39, season=2024). Returns rows written.
+        """
+        if table not in TABLES:
+            raise ValueError(f"Unknown table {table!r}, expected one of {list(TABLES)}")
+        if df is None or df.empty:
+            return 0
+
+        spec = TABLES[table]
+        df = self._prepare(table, df, constants)
+        written = 0
+        for values, part in df.groupby(spec["partitions"], sort=False, dropna=False):
+            values = values if isinstance(values, tuple) else (values,)
+            path = os.path.join(self._partition_dir(table, values), "part.parquet")
+
+            if os.path.exists(path):
+                existing = pq.read_table(path, memory_map=True).to_pandas()
+                part = pd.concat([existing, part], ignore_index=True)
+            part = part.drop_duplicates(subset=spec["keys"], keep="last")
+            part = part.sort_values(spec["sort"], kind="stable").reset_index(drop=True)
+
+            self._write_atomic(path, part)
+            written += len(part)
+        return written
+
+    @staticmethod
+    def _write_atomic(path, df, row_group_size: int = 4096):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path, compression="zstd",
+                           row_group_size=row_group_size)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def partitions(self, table, filters=None):
+        """Partition files that can match filters, pruned on folder names without opening any file."""
+        spec = TABLES[table]
+        partition_filters = [f for f in (filters or []) if f[0] in spec["partitions"]]
+        base = os.path.join(self.root, table)
+        found = []
+        for dirpath, _, files in os.walk(base):
+            if "part.parquet" not in files:
+                continue
+            rel = os.path.relpath(dirpath, base)
+            values = dict(piece.split("=", 1) for piece in rel.split(os.sep))
+            values = {k: _partition_value(v) for k, v in values.items()}
+            if all(_OPS[op](values.get(column), value) for column, op, value in partition_filters):
+                found.append(os.path.join(dirpath, "part.parquet"))
+        return sorted(found)
+
+    def read(self, table, columns=None, filters=None):
+        """
+        Loads a table as a DataFrame. filters is a list of (column, op, value) tuples ANDed together.
+        Filters on partition columns skip whole folders, the rest are pushed down into the parquet
+        reader so row groups that cant match are never decoded. Files are memory mapped.
+        """
+        row_filters = [(c, "==" if op == "=" else op, v) for c, op, v in (filters or [])]
+
+        tables = []
+        for path in self.partitions(table, filters):
+            tables.append(pq.read_table(path, columns=columns, filters=row_filters or None, memory_map=True))
+        if not tables:
+            return pd.DataFrame(columns=columns or [])
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
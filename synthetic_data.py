@@ -0,0 +1,305 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+# Fake but realistically shaped API-Football payloads, used for benchmarks so we dont spend quota
+
+
+def make_fixture(fixture_id, league_id, season, home_id, away_id, kickoff, status="FT", home_goals=None, away_goals=None,
+                 elapsed=None, round_name="Regular Season - 1"):
+    finished = status in ("FT", "AET", "PEN")
+    if home_goals is not None and away_goals is not None:
+        home_winner = None if home_goals == away_goals else home_goals > away_goals
+        away_winner = None if home_goals == away_goals else away_goals > home_goals
+    else:
+        home_winner = away_winner = None
+    return {
+        "fixture": {
+            "id": fixture_id,
+            "referee": f"Referee {fixture_id % 40}",
+            "timezone": "UTC",
+            "date": kickoff.isoformat(),
+            "timestamp": int(kickoff.timestamp()),
+            "periods": {"first": None, "second": None},
+            "venue": {"id": 500 + home_id, "name": f"Stadium {home_id}", "city": f"City {home_id}"},
+            "status": {
+                "long": {"FT": "Match Finished", "NS": "Not Started", "1H": "First Half", "HT": "Halftime",
+                         "2H": "Second Half", "PST": "Match Postponed"}.get(status, status),
+                "short": status,
+                "elapsed": 90 if finished else elapsed,
+            },
+        },
+        "league": {"id": league_id, "name": f"League {league_id}", "country": f"Country {league_id % 10}",
+                   "logo": f"https://media.api-sports.io/football/leagues/{league_id}.png", "flag": None,
+                   "season": season, "round": round_name},
+        "teams": {
+            "home": {"id": home_id, "name": f"Team {home_id}",
+                     "logo": f"https://media.api-sports.io/football/teams/{home_id}.png", "winner": home_winner},
+            "away": {"id": away_id, "name": f"Team {away_id}",
+                     "logo": f"https://media.api-sports.io/football/teams/{away_id}.png", "winner": away_winner},
+        },
+        "goals": {"home": home_goals, "away": away_goals},
+        "score": {
+            "halftime": {"home": None if home_goals is None else home_goals // 2,
+                         "away": None if away_goals is None else away_goals // 2},
+            "fulltime": {"home": home_goals if finished else None, "away": away_goals if finished else None},
+            "extratime": {"home": None, "away": None},
+            "penalty": {"home": None, "away": None},
+        },
+    }
+
+
+def league_season_fixtures(league_id, season, n_teams: int = 20, seed: int = None, now: datetime = None,
+                           first_fixture_id: int = None):
+    """Double round robin for one league-season. Matches before `now` are finished, later ones are NS."""
+    rng = random.Random(seed if seed is not None else league_id * 10000 + season)
+    now = now or datetime(season + 1, 7, 1, tzinfo=timezone.utc)
+    start = datetime(season, 8, 10, 15, 0, tzinfo=timezone.utc)
+    teams = [league_id * 1000 + i for i in range(1, n_teams + 1)]
+    fixture_id = first_fixture_id if first_fixture_id is not None else (league_id * 10000 + (season % 100)) * 1000
+
+    # Circle method so every team plays once per round
+    rotation = teams[:]
+    rounds = []
+    for _ in range(n_teams - 1):
+        rounds.append([(rotation[i], rotation[-1 - i]) for i in range(n_teams // 2)])
+        rotation = [rotation[0]] + [rotation[-1]] + rotation[1:-1]
+    rounds += [[(away, home) for home, away in matchday] for matchday in rounds]
+
+    fixtures = []
+    for round_index, matchday in enumerate(rounds):
+        for match_index, (home, away) in enumerate(matchday):
+            kickoff = start + timedelta(days=7 * round_index, hours=2 * (match_index % 4))
+            fixture_id += 1
+            if kickoff <= now:
+                fixtures.append(make_fixture(fixture_id, league_id, season, home, away, kickoff, "FT",
+                                             rng.choice([0, 0, 1, 1, 1, 2, 2, 3, 4]), rng.choice([0, 0, 1, 1, 2, 2, 3]),
+                                             round_name=f"Regular Season - {round_index + 1}"))
+            else:
+                fixtures.append(make_fixture(fixture_id, league_id, season, home, away, kickoff, "NS",
+                                             round_name=f"Regular Season - {round_index + 1}"))
+    return fixtures
+
+
+def multi_season_fixtures(n_fixtures: int = 50000, n_teams: int = 20, first_season: int = 2010):
+    """Enough league-seasons to reach n_fixtures, cut to exactly that many."""
+    fixtures = []
+    league_id = 1
+    while len(fixtures) < n_fixtures:
+        for season in range(first_season, first_season + 10):
+            fixtures += league_season_fixtures(league_id, season, n_teams)
+            if len(fixtures) >= n_fixtures:
+                break
+        league_id += 1
+    return fixtures[:n_fixtures]
+
+
+def standings_payload(league_id, season, fixtures):
+    """Standings built from finished fixtures, shaped like the standings endpoint."""
+    table = {}
+    for item in fixtures:
+        if item["fixture"]["status"]["short"] not in ("FT", "AET", "PEN"):
+            continue
+        home, away = item["teams"]["home"], item["teams"]["away"]
+        hg, ag = item["goals"]["home"], item["goals"]["away"]
+        for team, side, gf, ga in ((home, "home", hg, ag), (away, "away", ag, hg)):
+            row = table.setdefault(team["id"], {
+                "team": {"id": team["id"], "name": team["name"], "logo": team["logo"]},
+                "points": 0, "form": "",
+                "all": {"played": 0, "win": 0, "draw": 0, "lose": 0, "goals": {"for": 0, "against": 0}},
+                "home": {"played": 0, "win": 0, "draw": 0, "lose": 0, "goals": {"for": 0, "against": 0}},
+                "away": {"played": 0, "win": 0, "draw": 0, "lose": 0, "goals": {"for": 0, "against": 0}},
+            })
+            result = "win" if gf > ga else ("lose" if gf < ga else "draw")
+            row["points"] += {"win": 3, "draw": 1, "lose": 0}[result]
+            row["form"] = ({"win": "W", "draw": "D", "lose": "L"}[result] + row["form"])[:5]
+            for block in (row["all"], row[side]):
+                block["played"] += 1
+                block[result] += 1
+                block["goals"]["for"] += gf
+                block["goals"]["against"] += ga
+
+    rows = sorted(table.values(), key=lambda r: (-r["points"], -(r["all"]["goals"]["for"] - r["all"]["goals"]["against"])))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+        row["goalsDiff"] = row["all"]["goals"]["for"] - row["all"]["goals"]["against"]
+        row["group"] = f"League {league_id}"
+        row["status"] = "same"
+        row["description"] = None
+        row["update"] = "2024-01-01T00:00:00+00:00"
+    return {
+        "get": "standings",
+        "parameters": {"league": str(league_id), "season": str(season)},
+        "errors": [],
+        "results": 1,
+        "paging": {"current": 1, "total": 1},
+        "response": [{"league": {"id": league_id, "name": f"League {league_id}", "season": season, "standings": [rows]}}],
+    }
+
+
+def envelope(endpoint, params, response, page: int = 1, total_pages: int = 1):
+    """Wraps a response list the same way the real API does."""
+    return {
+        "get": endpoint,
+        "parameters": {k: str(v) for k, v in (params or {}).items()},
+        "errors": [],
+        "results": len(response) if isinstance(response, list) else 1,
+        "paging": {"current": page, "total": total_pages},
+        "response": response,
+    }
+
+
+def team_statistics_payload(league_id, season, team_id, fixtures, date: str = None):
+    """teams/statistics shaped response computed from finished fixtures (up to date if given)."""
+    played = {"home": 0, "away": 0}
+    wins = {"home": 0, "away": 0}
+    draws = {"home": 0, "away": 0}
+    loses = {"home": 0, "away": 0}
+    goals_for = {"home": 0, "away": 0}
+    goals_against = {"home": 0, "away": 0}
+    clean_sheet = {"home": 0, "away": 0}
+    failed = {"home": 0, "away": 0}
+    form = ""
+    team_name = f"Team {team_id}"
+    team_logo = f"https://media.api-sports.io/football/teams/{team_id}.png"
+
+    ordered = sorted(fixtures, key=lambda f: f["fixture"]["timestamp"])
+    for item in ordered:
+        if item["fixture"]["status"]["short"] not in ("FT", "AET", "PEN"):
+            continue
+        if date and item["fixture"]["date"][:10] > date:
+            continue
+        home, away = item["teams"]["home"], item["teams"]["away"]
+        if team_id not in (home["id"], away["id"]):
+            continue
+        side = "home" if home["id"] == team_id else "away"
+        team_name = (home if side == "home" else away)["name"]
+        gf = item["goals"][side]
+        ga = item["goals"]["away" if side == "home" else "home"]
+        played[side] += 1
+        goals_for[side] += gf
+        goals_against[side] += ga
+        clean_sheet[side] += ga == 0
+        failed[side] += gf == 0
+        if gf > ga:
+            wins[side] += 1
+            form += "W"
+        elif gf < ga:
+            loses[side] += 1
+            form += "L"
+        else:
+            draws[side] += 1
+            form += "D"
+
+    def split(block):
+        return {"home": block["home"], "away": block["away"], "total": block["home"] + block["away"]}
+
+    def average(goals):
+        return {
+            "home": f"{goals['home'] / max(1, played['home']):.1f}",
+            "away": f"{goals['away'] / max(1, played['away']):.1f}",
+            "total": f"{(goals['home'] + goals['away']) / max(1, played['home'] + played['away']):.1f}",
+        }
+
+    def longest(letter):
+        best = run = 0
+        for result in form:
+            run = run + 1 if result == letter else 0
+            best = max(best, run)
+        return best
+
+    rng = random.Random(team_id * 31 + season)
+    intervals = ["0-15", "16-30", "31-45", "46-60", "61-75", "76-90", "91-105", "106-120"]
+    response = {
+        "league": {"id": league_id, "name": f"League {league_id}", "country": f"Country {league_id % 10}",
+                   "season": season},
+        "team": {"id": team_id, "name": team_name, "logo": team_logo},
+        "form": form,
+        "fixtures": {"played": split(played), "wins": split(wins), "draws": split(draws), "loses": split(loses)},
+        "goals": {
+            "for": {"total": split(goals_for), "average": average(goals_for)},
+            "against": {"total": split(goals_against), "average": average(goals_against)},
+        },
+        "biggest": {
+            "streak": {"wins": longest("W"), "draws": longest("D"), "loses": longest("L")},
+            "wins": {"home": None, "away": None},
+            "loses": {"home": None, "away": None},
+        },
+        "clean_sheet": split(clean_sheet),
+        "failed_to_score": split(failed),
+        "penalty": {"scored": {"total": rng.randint(0, 8), "percentage": "80.00%"},
+                    "missed": {"total": rng.randint(0, 2), "percentage": "20.00%"}, "total": 10},
+        "lineups": [{"formation": "4-3-3", "played": played["home"] + played["away"]}],
+        "cards": {
+            "yellow": {i: {"total": rng.randint(0, 12), "percentage": None} for i in intervals},
+            "red": {i: {"total": rng.randint(0, 1), "percentage": None} for i in intervals},
+        },
+    }
+    params = {"league": league_id, "season": season, "team": team_id}
+    if date:
+        params["date"] = date
+    payload = envelope("teams/statistics", params, response)
+    payload["results"] = 11
+    return payload
+
+
+POSITIONS = ["Goalkeeper", "Defender", "Defender", "Defender", "Defender", "Midfielder", "Midfielder",
+             "Midfielder", "Attacker", "Attacker"]
+
+
+def make_player(player_id, team_id, league_id, season):
+    rng = random.Random(player_id * 7 + season)
+    appearances = rng.randint(0, 38)
+    position = POSITIONS[player_id % len(POSITIONS)]
+    return {
+        "player": {"id": player_id, "name": f"Player {player_id}", "firstname": "Player", "lastname": str(player_id),
+                   "age": rng.randint(17, 36), "nationality": f"Country {player_id % 30}",
+                   "height": f"{rng.randint(165, 200)} cm", "weight": f"{rng.randint(60, 95)} kg",
+                   "injured": rng.random() < 0.05,
+                   "photo": f"https://media.api-sports.io/football/players/{player_id}.png"},
+        "statistics": [{
+            "team": {"id": team_id, "name": f"Team {team_id}",
+                     "logo": f"https://media.api-sports.io/football/teams/{team_id}.png"},
+            "league": {"id": league_id, "name": f"League {league_id}", "country": f"Country {league_id % 10}",
+                       "season": season},
+            "games": {"appearences": appearances, "lineups": rng.randint(0, appearances),
+                      "minutes": appearances * rng.randint(20, 90), "number": None, "position": position,
+                      "rating": f"{rng.uniform(6.0, 8.0):.6f}" if appearances else None, "captain": False},
+            "substitutes": {"in": rng.randint(0, 10), "out": rng.randint(0, 10), "bench": rng.randint(0, 20)},
+            "shots": {"total": rng.randint(0, 90), "on": rng.randint(0, 40)},
+            "goals": {"total": rng.randint(0, 20) if position == "Attacker" else rng.randint(0, 5), "conceded": 0,
+                      "assists": rng.randint(0, 10), "saves": None},
+            "passes": {"total": rng.randint(0, 2000), "key": rng.randint(0, 80), "accuracy": rng.randint(60, 95)},
+            "tackles": {"total": rng.randint(0, 80), "blocks": rng.randint(0, 20), "interceptions": rng.randint(0, 50)},
+            "duels": {"total": rng.randint(0, 400), "won": rng.randint(0, 200)},
+            "dribbles": {"attempts": rng.randint(0, 100), "success": rng.randint(0, 60), "past": None},
+            "fouls": {"drawn": rng.randint(0, 60), "committed": rng.randint(0, 50)},
+            "cards": {"yellow": rng.randint(0, 10), "yellowred": 0, "red": rng.randint(0, 1)},
+            "penalty": {"won": None, "commited": None, "scored": rng.randint(0, 5), "missed": rng.randint(0, 1),
+                        "saved": None},
+        }],
+    }
+
+
+def players_page(league_id, season, page: int = 1, team_id: int = None, n_teams: int = 20,
+                 squad_size: int = 25, per_page: int = 20):
+    """One page of the players endpoint, for a whole league or a single team."""
+    teams = [team_id] if team_id is not None else [league_id * 1000 + i for i in range(1, n_teams + 1)]
+    player_ids = [(team, team * 100 + n) for team in teams for n in range(1, squad_size + 1)]
+    total_pages = max(1, -(-len(player_ids) // per_page))
+    chunk = player_ids[(page - 1) * per_page: page * per_page]
+    params = {"league": league_id, "season": season, "page": page}
+    if team_id is not None:
+        params["team"] = team_id
+    return envelope("players", params, [make_player(pid, team, league_id, season) for team, pid in chunk],
+                    page=page, total_pages=total_pages)
+
+
+def leagues_payload(n_leagues: int = 30):
+    response = [
+        {"league": {"id": league_id, "name": f"League {league_id}", "type": "League",
+                    "logo": f"https://media.api-sports.io/football/leagues/{league_id}.png"},
+         "country": {"name": f"Country {league_id % 10}", "code": None, "flag": None},
+         "seasons": [{"year": year, "current": year == 2024} for year in range(2010, 2025)]}
+        for league_id in range(1, n_leagues + 1)
+    ]
+    return envelope("leagues", {}, response)